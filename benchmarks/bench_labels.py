@@ -0,0 +1,70 @@
+'''
+    Label spooling throughput and peak memory.
+
+    PYTHONPATH=. python benchmarks/bench_labels.py --count 10000 --format ZPL
+'''
+
+import argparse
+import io
+import tempfile
+import time
+import tracemalloc
+
+from dpd_info_client_api.labels import DPDFileSpool, DPDLabelSpooler
+
+
+ZPL_LABEL = (
+    '^XA^CF0,40^FO50,50^FDDPD Polska^FS^FO50,120^BY3^BCN,150,Y,N,N^FD%013d^FS'
+    '^FO50,320^FDReciever %d^FS^FO50,370^FD00-999 City Name^FS^XZ'
+)
+
+EPL_LABEL = 'N\nA50,50,0,4,1,1,N,"DPD Polska"\nB50,100,0,1,3,7,150,B,"%013d"\nA50,300,0,3,1,1,N,"Reciever %d"\nP1\n'
+
+
+def pdf_label(i):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=283, height=425)
+    writer.add_metadata({'/Title': 'label %d' % i})
+
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def labels(count, outputDocFormat):
+    for i in range(count):
+        if outputDocFormat == 'ZPL':
+            yield (ZPL_LABEL % (i, i)).encode('ascii')
+        elif outputDocFormat == 'EPL':
+            yield (EPL_LABEL % (i, i)).encode('ascii')
+        else:
+            yield pdf_label(i)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--format', default='ZPL', choices=['ZPL', 'EPL', 'PDF'])
+    parser.add_argument('--labels-per-job', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='dpd-labels-')
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    with DPDLabelSpooler(DPDFileSpool(directory), args.format, args.labels_per_job) as spooler:
+        spooler.extend(labels(args.count, args.format))
+
+    took = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+
+    print('%d %s labels -> %d jobs in %.2fs - %.0f labels/s, peak memory %.1f MB (%s)' % (
+        args.count, args.format, len(spooler.jobs), took, args.count / took, peak / 1024 / 1024, directory
+    ))
+
+
+if __name__ == '__main__':
+    main()
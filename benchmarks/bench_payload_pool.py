@@ -0,0 +1,85 @@
+'''
+    Payload build throughput - single process vs DPDPayloadPool.
+
+    python benchmarks/bench_payload_pool.py --wsdl path/or/url/to/DPDPackageObjServices.wsdl
+'''
+
+import argparse
+import multiprocessing
+import time
+
+from dpd_info_client_api.api import DPDAPI
+from dpd_info_client_api.pool import DPDPayloadPool, _init_worker, _build_shipment
+from dpd_info_client_api.settings import DPDSettingsObject
+
+
+SENDER_DATA = {
+    'address': 'Street Name 1',
+    'city': 'City Name',
+    'company': 'Hal Zero Coders',
+    'countryCode': 'PL',
+    'email': 'office@mymail.com',
+    'fid': '123123',
+    'phone': 'Your Phone NO',
+    'postalCode': '00-999'
+}
+
+
+def shipments(count):
+    for i in range(count):
+        yield {
+            'packageData': {'weight': 1 + i % 30, 'content': 'Parcel %d' % i, 'reference': 'REF%d' % i},
+            'recieverData': dict(SENDER_DATA, company='Reciever %d' % i, postalCode='%05d' % (i % 100000)),
+            'servicesData': {'cod': 10 + i % 100} if i % 3 else {},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wsdl', default=DPDAPI.PROD_API_WSDL)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--processes', type=int, nargs='*', default=None)
+    parser.add_argument('--zeep', action='store_true', help='render with zeep instead of fast serializer')
+    args = parser.parse_args()
+
+    settings = DPDSettingsObject()
+    settings.DPD_API_USERNAME = 'bench'
+    settings.DPD_API_PASSWORD = 'bench'
+    settings.DPD_API_FID = '1'
+
+    api = DPDAPI(initZeep=False, settings=settings)
+    api.PROD_API_WSDL = args.wsdl
+    api.init_zeep()
+    api.setPickupAddress(SENDER_DATA)
+
+    #baseline - same code path, in process
+    _init_worker(
+        {'DPD_API_USERNAME': 'bench', 'DPD_API_PASSWORD': 'bench', 'DPD_API_FID': '1'},
+        False, args.wsdl, SENDER_DATA, not args.zeep
+    )
+
+    start = time.perf_counter()
+    for shipment in shipments(args.count):
+        _build_shipment(shipment)
+    single = time.perf_counter() - start
+
+    print('in process: %d payloads in %.2fs - %.0f/s' % (args.count, single, args.count / single))
+
+    cpus = multiprocessing.cpu_count()
+    for processes in args.processes or sorted(set([1, 2, 4, cpus])):
+        with DPDPayloadPool(api, processes=processes, fast=not args.zeep) as pool:
+            #warm up workers before timing
+            list(pool.buildMessages(shipments(processes)))
+
+            start = time.perf_counter()
+            for message in pool.buildMessages(shipments(args.count)):
+                pass
+            took = time.perf_counter() - start
+
+        print('%2d processes: %d payloads in %.2fs - %.0f/s (x%.2f)' % (
+            processes, args.count, took, args.count / took, single / took
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+'''
+    Hundreds of threads sharing one DPDAPI instance against local stub server.
+
+    Stub serves the fixture WSDL and canned responses from tests/fixtures - no DPD account or network needed.
+    Every thread uses its own sender address and generation policy via .context().
+
+    PYTHONPATH=. python benchmarks/stress_threads.py --threads 300 --calls 20
+'''
+
+import argparse
+import threading
+import time
+
+from tests import fixture_api
+from tests.stub import DPDStubServer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=300)
+    parser.add_argument('--calls', type=int, default=20, help='calls per thread')
+    parser.add_argument('--port', type=int, default=0, help='stub port, 0 - any free')
+    parser.add_argument('--delay', type=float, default=0.005, help='stub response delay in seconds')
+    args = parser.parse_args()
+
+    server = DPDStubServer(port=args.port, delay=args.delay).start()
+
+    api = fixture_api(wsdl=server.wsdl_url)
+    api.setPickupAddress({'city': 'Default'})
+
+    errors = []
+    barrier = threading.Barrier(args.threads)
+
+    def worker(n):
+        barrier.wait()
+
+        try:
+            with api.context(senderData={'city': 'Sender %d' % n}, generationPolicy=1 + n % 3):
+                for i in range(args.calls):
+                    payload = api.GenerateSingleParcelShipment(
+                        {'weight': 1}, {'city': 'Reciever %d' % n}, {}, returnPayload=True
+                    )
+
+                    assert payload[0].packages[0].sender.city == 'Sender %d' % n, 'sender leaked between threads'
+                    assert payload[1] == api.GP_VALUES[1 + n % 3], 'policy leaked between threads'
+
+                    api.generatePackagesNumbersV4(*payload)
+        except Exception as e:
+            errors.append((n, repr(e)))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    took = time.perf_counter() - start
+
+    calls = args.threads * args.calls
+    print('%d threads, %d calls in %.2fs - %.0f calls/s, %d errors' % (args.threads, calls, took, calls / took, len(errors)))
+    assert api.pickup_address.city == 'Default', 'shared sender was modified'
+
+    for n, error in errors[:10]:
+        print('thread %d: %s' % (n, error))
+
+    server.stop()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
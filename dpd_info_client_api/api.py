@@ -1,8 +1,13 @@
 import re
 import zeep
+import threading
+import contextlib
 import logging.config
 from decimal import Decimal
 
+from .profiling import DPDProfiler
+from .serializer import DPDFastSerializer
+
 
 try:
     from django.conf import settings as django_settings
@@ -10,9 +15,24 @@ except:
     django_settings = None
 
 
+class DPDCallContext(object):
+    '''
+        Per thread overrides of sender address and generation policy.
+        None - use what's set on the instance.
+    '''
+
+    def __init__(self, pickup_address=None, generation_policy=None):
+        self.pickup_address = pickup_address
+        self.generation_policy = generation_policy
+
+
 class DPDAPI(object):
     '''
         Class running DPD WSDL WebApi.
+
+        Concurrency: after init_zeep, setPickupAddress and setGenerationPolicy
+        the instance is read only and can be shared between threads.
+        Whatever differs between calls or threads goes to .context(...).
     '''
 
     PROD_API_WSDL = 'https://dpdservices.dpd.com.pl/DPDPackageObjServicesService/DPDPackageObjServices?WSDL'
@@ -26,13 +46,17 @@ class DPDAPI(object):
     SANDBOX_FID = None
 
     client = None
+    transport = None
     service = None
     factory = None
-    generation_policy = 1
-    pickup_address = None
+    fast_serializer = None
+    default_generation_policy = 1
+    default_pickup_address = None
 
-    def __init__(self, useTest=False, initZeep=True, settings=django_settings):
+    def __init__(self, useTest=False, initZeep=True, settings=django_settings, transport=None):
         self.useTest = useTest
+        self.transport = transport
+        self.local = threading.local()
         
         #sorry for that but i liked it from JS 
         settings and self.set_config(settings)
@@ -129,13 +153,21 @@ class DPDAPI(object):
         self.check_config()
 
         #wrapped client
-        self.client = zeep.Client(self.wsdl_url)
+        self.client = zeep.Client(self.wsdl_url, transport=self.transport)
         self.factory = self.client.type_factory('ns0')
 
         self.s = self.client.service
         self.service = self.s
         self.__attach_service_refs()
 
+    def profile(self, cprofileRate=0.0, traceMalloc=False):
+        '''
+            Opt-in per call profiling - build / serialise / network / parse split.
+            Use as context manager, report is available after the block.
+        '''
+
+        return DPDProfiler(cprofileRate, traceMalloc).attach(self)
+
     def enable_zeep_debug(self):
         '''
             Enable verbose ZEEP debugging.
@@ -164,6 +196,19 @@ class DPDAPI(object):
             }
         })
 
+    def enable_fast_serializer(self, operations=DPDFastSerializer.FAST_OPERATIONS, verify=True):
+        '''
+            Route hot operations through direct envelope serializer.
+            First call of every operation is checked against zeep output when verify is on.
+        '''
+
+        self.fast_serializer = DPDFastSerializer(self, operations, verify)
+
+        for operation in operations:
+            setattr(self, operation, self.fast_serializer.operation(operation))
+
+        return self.fast_serializer
+
     def get_from_factory(self, object_type):
         '''
             Grab fresh type from factory.
@@ -190,13 +235,20 @@ class DPDAPI(object):
 
         return service_method
 
+    def wrap_service_method(self, method, wrapper):
+        '''
+            Replace service method attached to instance with wrapper(service_method).
+            Wrappers stack - each one gets what was attached before.
+        '''
+
+        setattr(self, method, wrapper(getattr(self, method, None) or self.service_get(method)))
+
     def service_call_auth_proxy(self, method, *args):
         '''
             That's preety much proxied call.
         '''
         
-        any(args) and args.append(self.authPayload)
-        return self.service_get(method)(*args)
+        return self.service_get(method)(*(args + (self.authPayload,)))
     
     def __validateFunctionArgs(self, valid_args, kwargs):
         
@@ -217,26 +269,93 @@ class DPDAPI(object):
         3: "ALL_OR_NOTHING"
     }
 
+    def validateGenerationPolicy(self, generation_policy):
+        if generation_policy not in self.GP_VALUES:
+            gp = ", ".join('%s - %s' % (p,v) for p,v in self.GP_VALUES.items())
+            raise ValueError('Pick valid generation policy - choices are: %s' % gp)
+
+        return generation_policy
+
     def setGenerationPolicy(self, generation_policy):
         '''
             1 - Generation stops on first error - but leaves the packages that worked.
             2 - Hold my beer mode :D We ignore the errors ....
             3 - All or nothing - a stunning full success is required.
-        '''
 
-        if generation_policy not in self.GP_VALUES:
-            gp = ", ".join('%s - %s' % (p,v) for p,v in self.GP_VALUES.items())
-            raise ValueError('Pick valid generation policy - choices are: %s' % gp)
+            Inside .context(...) it's set for current context only.
+        '''
 
-        self.generation_policy = generation_policy
+        self.generation_policy = self.validateGenerationPolicy(generation_policy)
     
     def setPickupAddress(self, pickup_address):
         '''
             Set parcel pickup address for all requests.
+            Inside .context(...) it's set for current context only.
         '''
         self.pickup_address = self.getAdressPayload(**pickup_address)
         return self.pickup_address
 
+    @property
+    def current_context(self):
+        contexts = getattr(self.local, 'contexts', None)
+        return contexts[-1] if contexts else None
+
+    @contextlib.contextmanager
+    def context(self, senderData=None, generationPolicy=None):
+        '''
+            Sender address and generation policy for calls made in this thread, in this block.
+            Contexts nest - inner one inherits what it does not set.
+
+            with DPD_ApiInstance.context(senderData=WAREHOUSE_2, generationPolicy=3):
+                DPD_ApiInstance.GenerateSingleParcelShipment(...)
+        '''
+
+        if generationPolicy is not None:
+            self.validateGenerationPolicy(generationPolicy)
+
+        context = DPDCallContext(
+            pickup_address=self.getAdressPayload(**senderData) if senderData else self.pickup_address,
+            generation_policy=generationPolicy or self.generation_policy
+        )
+
+        if getattr(self.local, 'contexts', None) is None:
+            self.local.contexts = []
+
+        self.local.contexts.append(context)
+
+        try:
+            yield context
+        finally:
+            self.local.contexts.pop()
+
+    @property
+    def pickup_address(self):
+        context = self.current_context
+        return context.pickup_address if context else self.default_pickup_address
+
+    @pickup_address.setter
+    def pickup_address(self, pickup_address):
+        context = self.current_context
+
+        if context:
+            context.pickup_address = pickup_address
+        else:
+            self.default_pickup_address = pickup_address
+
+    @property
+    def generation_policy(self):
+        context = self.current_context
+        return context.generation_policy if context else self.default_generation_policy
+
+    @generation_policy.setter
+    def generation_policy(self, generation_policy):
+        context = self.current_context
+
+        if context:
+            context.generation_policy = generation_policy
+        else:
+            self.default_generation_policy = generation_policy
+
     @property
     def authPayload(self):
         '''
@@ -422,7 +541,7 @@ class DPDAPI(object):
             dutyPayload = self['serviceDutyOpenUMLeFV2']
             dutyPayload.amount = duty
             dutyPayload.currency = dutyCurrency
-            servicesPayload.duty = serviceDutyOpenUMLeFV2           
+            servicesPayload.duty = dutyPayload
         
         if dpdExpress:
             servicesPayload.dpdExpress = self['serviceFlagOpenUMLF']
@@ -478,7 +597,7 @@ class DPDAPI(object):
                 raise ValueError('servicesPayload selfCol should be either PRIV or COMP')
 
             scPayload = self['serviceSelfColOpenUMLFeV1']
-            sgPayload.reciever = self.get_from_factory(
+            scPayload.receiver = self.get_from_factory(
                 'serviceSelfColReceiverTypeEnumOpenUMLFeV1')(selfCol)
 
             servicesPayload.selfCol = scPayload
@@ -703,15 +822,31 @@ class DPDAPI(object):
             self.authPayload
         )
 
+    PICKUP_ORDER_TYPES = ['DOMESTIC', 'INTERNATIONAL']
+    PICKUP_OPERATION_TYPES = ['INSERT', 'CANCEL']
+
     def pickupCall(self, 
             waybills,
-            senderData=None,            
+            pickupDate,
+            pickupTimeFrom,
+            pickupTimeTo,
+            senderData=None,
+            parcelsWeight=None,
+            parcelMaxWeight=None,
+            parcelMaxHeight=None,
+            parcelMaxWidth=None,
+            parcelMaxDepth=None,
+            orderType='DOMESTIC',
+            operationType='INSERT',
+            orderNumber=None,
+            checkSum=None,
+            payerNumber=None,
             returnPayload=False
         ):
-
-        raise NotImplementedError('Function is not implemented')
-
         '''
+            Orders courier pickup of ready waybills.
+            pickupDate - 'YYYY-MM-DD', pickupTimeFrom / pickupTimeTo - 'HH:MM'.
+
             <xs:complexType name="dpdPickupCallParamsV3">
             <xs:sequence>
             <xs:element name="checkSum" type="xs:int" minOccurs="0"/>
@@ -726,31 +861,76 @@ class DPDAPI(object):
             <xs:element name="waybillsReady" type="xs:boolean" minOccurs="0"/>
             </xs:sequence>
             </xs:complexType>
-        
+        '''
 
-        dpdPickupCallParamsPayload = self['dpdPickupCallParamsV3']
-        
-        SESSION_TYPES = ['DOMESTIC', 'INTERNATIONAL']
-        if sessionType not in SESSION_TYPES:
-            raise ValueError('sessionType should be one of: %s' % ",".join(SESSION_TYPES))
+        if not waybills:
+            raise AttributeError('At least one waybill is required !')
 
-        sessionPayload = self['sessionDSPV1']
-        sessionPayload.sessionType = self.get_from_factory('sessionTypeDSPEnumV1')(sessionType)
+        if orderType not in self.PICKUP_ORDER_TYPES:
+            raise ValueError('orderType should be one of: %s' % ",".join(self.PICKUP_ORDER_TYPES))
 
-        packagePayload = self['packageDSPV1']
+        if operationType not in self.PICKUP_OPERATION_TYPES:
+            raise ValueError('operationType should be one of: %s' % ",".join(self.PICKUP_OPERATION_TYPES))
 
-        for waybill in waybills:
-            parcelPayload = self['parcelDSPV1']
-            parcelPayload.waybill = waybill
-            packagePayload.parcels.append(parcelPayload)
+        if senderData:
+            sender = self.getAdressPayload(**senderData)
+        else:
+            if not self.pickup_address:
+                raise UnboundLocalError('Sender address is not defined, either provide senderData argument or setPickupAddress')
 
-        sessionPayload.packages = packagePayload
+            sender = self.pickup_address
+
+        pickupSenderPayload = self['pickupSenderDPPV1']
+        pickupSenderPayload.senderAddress = sender.address
+        pickupSenderPayload.senderCity = sender.city
+        pickupSenderPayload.senderFullName = sender.company or sender.name
+        pickupSenderPayload.senderName = sender.name or sender.company
+        pickupSenderPayload.senderPhone = sender.phone
+        pickupSenderPayload.senderPostalCode = sender.postalCode
+
+        pickupCustomerPayload = self['pickupCustomerDPPV1']
+        pickupCustomerPayload.customerFullName = sender.company or sender.name
+        pickupCustomerPayload.customerName = sender.name or sender.company
+        pickupCustomerPayload.customerPhone = sender.phone
+
+        pickupPayerPayload = self['pickupPayerDPPV1']
+        pickupPayerPayload.payerName = sender.company or sender.name
+        pickupPayerPayload.payerNumber = payerNumber or self.API_FID
+
+        packagesParamsPayload = self['pickupPackagesParamsDPPV1']
+        packagesParamsPayload.dox = False
+        packagesParamsPayload.pallet = False
+        packagesParamsPayload.standardParcel = True
+        packagesParamsPayload.parcelsCount = len(waybills)
+
+        parcelsWeight and setattr(packagesParamsPayload, 'parcelsWeight', parcelsWeight)
+        parcelMaxWeight and setattr(packagesParamsPayload, 'parcelMaxWeight', parcelMaxWeight)
+        parcelMaxHeight and setattr(packagesParamsPayload, 'parcelMaxHeight', parcelMaxHeight)
+        parcelMaxWidth and setattr(packagesParamsPayload, 'parcelMaxWidth', parcelMaxWidth)
+        parcelMaxDepth and setattr(packagesParamsPayload, 'parcelMaxDepth', parcelMaxDepth)
+
+        detailsPayload = self['pickupCallSimplifiedDetailsDPPV1']
+        detailsPayload.packagesParams = packagesParamsPayload
+        detailsPayload.pickupCustomer = pickupCustomerPayload
+        detailsPayload.pickupPayer = pickupPayerPayload
+        detailsPayload.pickupSender = pickupSenderPayload
 
-        dpdServicesParamsPayload.session = sessionPayload
+        dpdPickupCallParamsPayload = self['dpdPickupCallParamsV3']
+        dpdPickupCallParamsPayload.operationType = self.get_from_factory('pickupCallOperationTypeDPPEnumV1')(operationType)
+        dpdPickupCallParamsPayload.orderType = self.get_from_factory('pickupCallOrderTypeDPPEnumV1')(orderType)
+        dpdPickupCallParamsPayload.pickupCallSimplifiedDetails = detailsPayload
+        dpdPickupCallParamsPayload.pickupDate = pickupDate
+        dpdPickupCallParamsPayload.pickupTimeFrom = pickupTimeFrom
+        dpdPickupCallParamsPayload.pickupTimeTo = pickupTimeTo
+        dpdPickupCallParamsPayload.waybillsReady = True
 
+        orderNumber and setattr(dpdPickupCallParamsPayload, 'orderNumber', orderNumber)
+        checkSum and setattr(dpdPickupCallParamsPayload, 'checkSum', checkSum)
+
+        if returnPayload:
+            return [dpdPickupCallParamsPayload, self.authPayload]
 
         return self.packagesPickupCallV4(
-            dpdServicesParamsPayload,      
+            dpdPickupCallParamsPayload,
             self.authPayload
         )
-        '''
@@ -0,0 +1,470 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zeep.helpers import serialize_object
+
+from .settings import DPDSettingsObject
+
+
+SETTINGS_KEYS = [
+    'DPD_API_USERNAME',
+    'DPD_API_PASSWORD',
+    'DPD_API_FID',
+    'DPD_API_SANDBOX_USERNAME',
+    'DPD_API_SANDBOX_PASSWORD',
+    'DPD_API_SANDBOX_FID',
+]
+
+#CSV column types for shipments - everything else is a string
+COLUMN_TYPES = {
+    'package.sizeX': int,
+    'package.sizeY': int,
+    'package.sizeZ': int,
+    'package.weight': float,
+    'services.cod': float,
+    'services.declaredValue': float,
+    'services.duty': float,
+}
+
+#on / off services of getServicesPayload
+SERVICE_FLAGS = [
+    'carryIn', 'cud', 'dedicatedDelivery', 'documentsInternational', 'dox', 'dpdExpress',
+    'inPers', 'pallet', 'privPers', 'rod', 'tires', 'tiresExport',
+]
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'no', 'n')
+
+
+def parse_flag(column, value):
+    if value.lower() in TRUE_VALUES:
+        return True
+
+    if value.lower() in FALSE_VALUES:
+        return False
+
+    raise ValueError('%s should be one of: %s - got %r' % (column, ",".join(TRUE_VALUES + FALSE_VALUES), value))
+
+
+def settings_from_env():
+    settings = DPDSettingsObject()
+
+    for key in SETTINGS_KEYS:
+        setattr(settings, key, os.environ.get(key))
+
+    return settings
+
+
+class RateLimiter(object):
+    '''
+        At most rate calls per second, shared by all workers.
+    '''
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        delay > 0 and time.sleep(delay)
+
+
+class Progress(object):
+    '''
+        Append only file with keys of finished items - rerun skips them.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.fh = None
+
+        if path and os.path.exists(path):
+            with open(path) as fh:
+                self.done = set(line.rstrip('\n') for line in fh if line.strip())
+
+        if path:
+            self.fh = open(path, 'a')
+
+    def mark(self, keys):
+        if self.fh:
+            self.fh.write(''.join('%s\n' % key for key in keys))
+            self.fh.flush()
+
+        self.done.update(keys)
+
+    def close(self):
+        self.fh and self.fh.close()
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.ok = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def report(self):
+        took = time.monotonic() - self.start
+        done = self.ok + self.failed
+
+        sys.stderr.write('%d done (%d ok, %d failed), %d skipped in %.1fs - %.1f/s\n' % (
+            done, self.ok, self.failed, self.skipped, took, done / took if took else 0
+        ))
+
+
+class Runner(object):
+    '''
+        Streams (key, item) pairs through worker threads in batches.
+        Results come back in input order, batch by batch.
+    '''
+
+    def __init__(self, options):
+        self.batchSize = options.batch_size
+        self.limiter = RateLimiter(options.rate)
+        self.progress = Progress(options.progress)
+        self.stats = Stats()
+        self.executor = ThreadPoolExecutor(max_workers=options.workers)
+
+    def call(self, func, item):
+        self.limiter.wait()
+
+        try:
+            return True, func(item)
+        except Exception as e:
+            return False, e
+
+    def batches(self, items, func):
+        '''
+            Yields [(key, ok, result_or_exception)] per batch - mark progress after handling it.
+        '''
+
+        pending = ((key, item) for key, item in items if not self.skip(key))
+
+        while True:
+            batch = list(itertools.islice(pending, self.batchSize))
+
+            if not batch:
+                break
+
+            futures = [(key, self.executor.submit(self.call, func, item)) for key, item in batch]
+            results = []
+
+            for key, future in futures:
+                ok, result = future.result()
+                results.append((key, ok, result))
+
+                if ok:
+                    self.stats.ok += 1
+                else:
+                    self.stats.failed += 1
+
+            yield results
+
+    def skip(self, key):
+        if key in self.progress.done:
+            self.stats.skipped += 1
+            return True
+
+        return False
+
+    def mark(self, results):
+        self.progress.mark([key for key, ok, result in results if ok])
+
+    def close(self):
+        self.executor.shutdown()
+        self.progress.close()
+        self.stats.report()
+
+
+def read_lines(path):
+    fh = sys.stdin if path == '-' else open(path)
+
+    with fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield line, line
+
+
+def read_shipments(path):
+    '''
+        CSV with package.*, receiver.*, sender.*, services.* columns + ref1, ref2, ref3, reference, payerType.
+        Key is reference column or row number.
+    '''
+
+    fh = sys.stdin if path == '-' else open(path, newline='')
+
+    with fh:
+        for number, row in enumerate(csv.DictReader(fh), 1):
+            shipment = {'packageData': {}, 'recieverData': {}, 'servicesData': {}}
+            groups = {'package': 'packageData', 'receiver': 'recieverData', 'sender': 'senderData', 'services': 'servicesData'}
+
+            for column, value in row.items():
+                if value in (None, ''):
+                    continue
+
+                if column.startswith('services.') and column[len('services.'):] in SERVICE_FLAGS:
+                    try:
+                        value = parse_flag(column, value.strip())
+                    except ValueError as e:
+                        raise ValueError('Row %d: %s' % (number, e))
+                else:
+                    value = COLUMN_TYPES.get(column, str)(value)
+
+                if '.' in column:
+                    group, field = column.split('.', 1)
+                    shipment.setdefault(groups[group], {})[field] = value
+                else:
+                    shipment[column] = value
+
+            yield row.get('reference') or str(number), shipment
+
+
+def get_api(options):
+    from .api import DPDAPI
+
+    api = DPDAPI(useTest=options.test, settings=settings_from_env())
+
+    if options.sender:
+        with open(options.sender) as fh:
+            api.setPickupAddress(json.load(fh))
+
+    if getattr(options, 'fast', False):
+        api.enable_fast_serializer()
+
+    return api
+
+
+def get_info_api(options):
+    from .infoapi import DPDInfoAPI
+
+    return DPDInfoAPI(settings=settings_from_env())
+
+
+def output(options):
+    return sys.stdout if options.output in (None, '-') else open(options.output, 'a')
+
+
+def cmd_shipments(options):
+    api = get_api(options)
+    runner = Runner(options)
+    out = output(options)
+    writer = csv.writer(out)
+
+    def generate(shipment):
+        response = api.GenerateSingleParcelShipment(**shipment)
+
+        return [
+            [package.Status, package.PackageId, ' '.join(p.Waybill for p in package.Parcels.Parcel if p.Waybill), response.Status]
+            for package in response.Packages.Package
+        ]
+
+    for results in runner.batches(read_shipments(options.input), generate):
+        for key, ok, rows in results:
+            if not ok:
+                writer.writerow([key, 'ERROR', '', '', repr(rows)])
+                continue
+
+            for row in rows:
+                writer.writerow([key] + row)
+
+        out.flush()
+        runner.mark(results)
+
+    runner.close()
+
+
+def cmd_labels(options):
+    from .labels import DPDFileSpool, DPDLabelSpooler
+
+    api = get_api(options)
+    runner = Runner(options)
+    spooler = DPDLabelSpooler(DPDFileSpool(options.output_dir, prefix='labels-%d' % os.getpid()), options.format, options.batch_size)
+
+    def label(waybill):
+        return api.GenerateSpedLabel(waybill=waybill, outputDocFormat=options.format, docPageFormat=options.page_format)
+
+    #unmarked batch is not spooled when interrupted - it's retried on resume
+    with spooler:
+        for results in runner.batches(read_lines(options.input), label):
+            for key, ok, result in results:
+                if ok:
+                    spooler.add(result)
+                else:
+                    sys.stderr.write('%s: %r\n' % (key, result))
+
+            #job on disk - now it's safe to mark
+            spooler.close_job()
+            runner.mark(results)
+
+    runner.close()
+
+
+def cmd_protocol(options):
+    from .labels import DPDFileSpool
+
+    api = get_api(options)
+    runner = Runner(options)
+    spool = DPDFileSpool(options.output_dir, prefix='protocol-%d' % os.getpid())
+
+    def batched(items):
+        while True:
+            batch = list(itertools.islice(items, options.batch_size))
+            if not batch:
+                return
+            yield ' '.join(key for key, item in batch), [item for key, item in batch]
+
+    def protocol(waybills):
+        return api.generateProtocol(waybills, outputDocFormat=options.format, docPageFormat=options.page_format)
+
+    waybills = (item for item in read_lines(options.input) if not runner.skip(item[0]))
+
+    #one protocol per batch - workers run batches in parallel
+    runner.batchSize = options.workers
+
+    for results in runner.batches(batched(waybills), protocol):
+        for key, ok, result in results:
+            if not ok:
+                sys.stderr.write('%s: %r\n' % (key, result))
+                continue
+
+            handle, path = tempfile.mkstemp()
+            with os.fdopen(handle, 'wb') as fh:
+                fh.write(result.documentData)
+
+            spool.submit(path, options.format)
+
+        runner.progress.mark([w for key, ok, result in results if ok for w in key.split(' ')])
+
+    runner.close()
+
+
+def cmd_track(options):
+    infoApi = get_info_api(options)
+    runner = Runner(options)
+    out = output(options)
+
+    def track(waybill):
+        return serialize_object(infoApi.getEventsForWaybill(waybill, getAll=options.all), dict)
+
+    for results in runner.batches(read_lines(options.input), track):
+        for key, ok, result in results:
+            out.write(json.dumps({'waybill': key, 'ok': ok, 'result': result if ok else repr(result)}, default=str) + '\n')
+
+        out.flush()
+        runner.mark(results)
+
+    runner.close()
+
+
+def cmd_events_drain(options):
+    from .export import DPDEventExporter
+    from .tracking import DPDTrackingStore
+
+    infoApi = get_info_api(options)
+    stats = Stats()
+    limiter = RateLimiter(options.rate)
+
+    with DPDEventExporter(options.output, options.format, batchSize=options.batch_size) as exporter:
+        while True:
+            limiter.wait()
+            response = infoApi.getEventsForCustomer(options.limit)
+            events = DPDTrackingStore.eventsFrom(response)
+
+            exporter.extend(events)
+            exporter.flush()
+
+            stats.ok += len(events)
+
+            #unconfirmed events come back again - without confirming there is only one page
+            if options.no_confirm:
+                break
+
+            confirmId = getattr(response, 'confirmId', None)
+
+            if events and confirmId:
+                infoApi.confirmEventRecieved(confirmId)
+
+            if len(events) < options.limit or not confirmId:
+                break
+
+    stats.report()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='dpd',
+        description='Bulk DPD operations. Credentials are read from DPD_API_* environment variables.'
+    )
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=4, help='parallel calls')
+    common.add_argument('--batch-size', type=int, default=100, help='items in flight / per job')
+    common.add_argument('--rate', type=float, default=None, help='max calls per second')
+    common.add_argument('--progress', default=None, help='progress file - rerun skips finished items')
+    common.add_argument('--test', action='store_true', help='use sandbox')
+    common.add_argument('--sender', default=None, help='JSON file with sender address')
+
+    documents = argparse.ArgumentParser(add_help=False)
+    documents.add_argument('--output-dir', required=True)
+    documents.add_argument('--format', default='PDF', choices=['PDF', 'TIFF', 'PS', 'EPL', 'ZPL'])
+    documents.add_argument('--page-format', default='LBL_PRINTER', choices=['A4', 'LBL_PRINTER'])
+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    sub = commands.add_parser('shipments', parents=[common], help='generate shipments from CSV')
+    sub.add_argument('input', help='CSV file, - for stdin')
+    sub.add_argument('--output', default='-', help='result CSV (appended)')
+    sub.add_argument('--fast', action='store_true', help='use fast serializer')
+    sub.set_defaults(func=cmd_shipments)
+
+    sub = commands.add_parser('labels', parents=[common, documents], help='labels for waybills')
+    sub.add_argument('input', help='file with waybill per line, - for stdin')
+    sub.set_defaults(func=cmd_labels)
+
+    sub = commands.add_parser('protocol', parents=[common, documents], help='protocols for waybills, one per batch')
+    sub.add_argument('input', help='file with waybill per line, - for stdin')
+    sub.set_defaults(func=cmd_protocol)
+
+    sub = commands.add_parser('track', parents=[common], help='events for waybills as NDJSON')
+    sub.add_argument('input', help='file with waybill per line, - for stdin')
+    sub.add_argument('--all', action='store_true', help='full history instead of last event')
+    sub.add_argument('--output', default='-')
+    sub.set_defaults(func=cmd_track)
+
+    sub = commands.add_parser('events-drain', parents=[common], help='drain customer event feed to file')
+    sub.add_argument('output', help='ndjson / csv file (appended to) or directory for parquet part files')
+    sub.add_argument('--format', default=None, choices=['parquet', 'ndjson', 'csv'])
+    sub.add_argument('--limit', type=int, default=1000, help='events per request')
+    sub.add_argument('--no-confirm', action='store_true', help='do not mark events as processed - exports one page only')
+    sub.set_defaults(func=cmd_events_drain)
+
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    options.func(options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import keyword
+import sys
+
+import zeep
+
+
+HEADER = '''\'\'\'
+    Payload builders generated from %(wsdl)s
+
+    Do not edit - regenerate with:
+        python -m dpd_info_client_api.codegen %(wsdl)s --output %(output)s
+\'\'\'
+
+from dpd_info_client_api.codegen import DPDBuilder
+
+
+WSDL = %(wsdl)r
+'''
+
+
+class DPDBuilder(object):
+    '''
+        Base of generated payload builders.
+
+        Builders are plain __slots__ objects - no factory lookup by name and no
+        validation while building. They can be passed to the fast serializer
+        as they are and to zeep operations as builder.to_dict().
+    '''
+
+    __slots__ = ()
+
+    #xsd type name, attribute -> element name (for python keywords), repeated elements
+    _type = None
+    _elements = {}
+    _many = frozenset()
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        #element named like python keyword - renderers look it up by element name
+        for attribute, element in self._elements.items():
+            if element == name:
+                return getattr(self, attribute)
+
+        raise AttributeError('%s has no element %s' % (type(self).__name__, name))
+
+    def __iter__(self):
+        for attribute in self.__slots__:
+            yield self._elements.get(attribute, attribute), getattr(self, attribute)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and list(self) == list(other)
+
+    def __repr__(self):
+        return '%s(%s)' % (
+            type(self).__name__, ', '.join('%s=%r' % (k, v) for k, v in self if v is not None)
+        )
+
+    def to_dict(self):
+        '''
+            Nested dicts for zeep - None values are left out.
+        '''
+
+        result = {}
+
+        for name, value in self:
+            if value is None:
+                continue
+
+            if isinstance(value, list):
+                value = [v.to_dict() if isinstance(v, DPDBuilder) else v for v in value]
+            elif isinstance(value, DPDBuilder):
+                value = value.to_dict()
+
+            result[name] = value
+
+        return result
+
+
+def type_name(xsd_type, parent, element_name):
+    if xsd_type.qname is not None:
+        return xsd_type.qname.localname
+
+    #anonymous complex type - named after its place in the schema
+    return '%s_%s' % (parent, element_name)
+
+
+def attribute_name(element_name):
+    return element_name + '_' if keyword.iskeyword(element_name) else element_name
+
+
+def collect_types(client, operations=None):
+    '''
+        {type name: [(element name, xsd type name, accepts_multiple, is_complex)]}
+        for every complex type reachable from operation inputs.
+    '''
+
+    types = {}
+    signatures = {}
+
+    def visit(xsd_type, name):
+        if name in types:
+            return
+
+        fields = types[name] = []
+
+        for element_name, element in xsd_type.elements:
+            if isinstance(element.type, zeep.xsd.ComplexType):
+                child = type_name(element.type, name, element_name)
+                visit(element.type, child)
+                fields.append((element_name, child, element.accepts_multiple, True))
+            else:
+                child = element.type.qname.localname if element.type.qname is not None else 'string'
+                fields.append((element_name, child, element.accepts_multiple, False))
+
+    for service in client.wsdl.services.values():
+        for port in service.ports.values():
+            for operation_name, operation in port.binding._operations.items():
+                if operations and operation_name not in operations:
+                    continue
+
+                arguments = signatures[operation_name] = []
+
+                for element_name, element in operation.input.body.type.elements:
+                    if isinstance(element.type, zeep.xsd.ComplexType):
+                        child = type_name(element.type, operation_name, element_name)
+                        visit(element.type, child)
+                        arguments.append((element_name, child))
+                    else:
+                        arguments.append((element_name, None))
+
+    return types, signatures
+
+
+def render_class(name, fields):
+    attributes = [attribute_name(element_name) for element_name, _, _, _ in fields]
+
+    lines = ['', '', 'class %s(DPDBuilder):' % name, "    '''"]
+
+    for element_name, field_type, many, _ in fields:
+        lines.append('        %s: %s' % (attribute_name(element_name), '[%s]' % field_type if many else field_type))
+
+    if not fields:
+        lines.append('        no elements')
+
+    lines += [
+        "    '''",
+        '',
+        '    __slots__ = %r' % (tuple(attributes),),
+        '    _type = %r' % name,
+    ]
+
+    aliases = dict((attribute_name(e), e) for e, _, _, _ in fields if attribute_name(e) != e)
+
+    if aliases:
+        lines.append('    _elements = %r' % aliases)
+
+    many = [attribute_name(e) for e, _, m, _ in fields if m]
+
+    if many:
+        lines.append('    _many = frozenset(%r)' % many)
+
+    lines += ['', '    def __init__(self%s):' % ''.join(', %s=None' % a for a in attributes)]
+    lines += ['        self.%s = %s' % (a, a) for a in attributes] or ['        pass']
+
+    return lines
+
+
+def generate(wsdl, output='builders.py', operations=None, transport=None):
+    '''
+        Python source of builder module for request types of the WSDL.
+    '''
+
+    client = zeep.Client(wsdl, transport=transport)
+    types, signatures = collect_types(client, operations)
+
+    lines = [HEADER % {'wsdl': wsdl, 'output': output}]
+
+    #operation arguments in call order - None for simple values
+    lines.append('OPERATIONS = {')
+    for operation_name in sorted(signatures):
+        lines.append('    %r: %r,' % (operation_name, tuple(signatures[operation_name])))
+    lines.append('}')
+
+    for name in sorted(types):
+        lines += render_class(name, types[name])
+
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def verify(module, client):
+    '''
+        Compares generated builders with the schema loaded by zeep - empty list when they match.
+        Run it after init_zeep to catch WSDL changes: verify(builders, DPD_ApiInstance.client)
+    '''
+
+    types, signatures = collect_types(client, list(module.OPERATIONS))
+    problems = []
+
+    for operation_name, arguments in sorted(signatures.items()):
+        if tuple(arguments) != tuple(module.OPERATIONS.get(operation_name, ())):
+            problems.append('%s: arguments %r, builders have %r' % (
+                operation_name, arguments, module.OPERATIONS.get(operation_name)
+            ))
+
+    for name, fields in sorted(types.items()):
+        builder = getattr(module, name, None)
+
+        if builder is None:
+            problems.append('%s: no builder' % name)
+            continue
+
+        expected = [attribute_name(element_name) for element_name, _, _, _ in fields]
+
+        if list(builder.__slots__) != expected:
+            problems.append('%s: elements %r, builder has %r' % (name, expected, list(builder.__slots__)))
+
+        many = frozenset(attribute_name(e) for e, _, m, _ in fields if m)
+
+        if builder._many != many:
+            problems.append('%s: repeated elements %r, builder has %r' % (name, sorted(many), sorted(builder._many)))
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m dpd_info_client_api.codegen',
+        description='Generates __slots__ payload builders for request types of DPD WSDL.'
+    )
+    parser.add_argument('wsdl', help='WSDL url or path - DPDAPI.PROD_API_WSDL, DPDInfoAPI.PROD_API_WSDL_OBJ...')
+    parser.add_argument('--output', default='-', help='python module path, - for stdout')
+    parser.add_argument('--operation', action='append', default=None, help='only these operations (repeatable)')
+
+    options = parser.parse_args(argv)
+    source = generate(options.wsdl, options.output, options.operation)
+
+    if options.output == '-':
+        sys.stdout.write(source)
+    else:
+        with open(options.output, 'w') as fh:
+            fh.write(source)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+default_app_config = 'dpd_info_client_api.django_app.apps.DPDConfig'
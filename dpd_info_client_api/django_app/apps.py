@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class DPDConfig(AppConfig):
+    name = 'dpd_info_client_api.django_app'
+    label = 'dpd_info_client_api'
+    verbose_name = 'DPD API'
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from zeep.cache import Base
+
+
+def dpd_cache():
+    return caches[getattr(settings, 'DPD_CACHE_ALIAS', 'default')]
+
+
+def cache_key(prefix, *parts):
+    #memcached does not like long keys and spaces
+    return 'dpd:%s:%s' % (prefix, hashlib.md5(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest())
+
+
+class DjangoWSDLCache(Base):
+    '''
+        Zeep cache for WSDL / XSD documents stored in Django cache.
+        Shared by all processes - workers do not fetch the schema from DPD on start.
+    '''
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'DPD_WSDL_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    def add(self, url, content):
+        dpd_cache().set(cache_key('wsdl', url), content, self.timeout)
+
+    def get(self, url):
+        return dpd_cache().get(cache_key('wsdl', url))
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import zeep
+from django.conf import settings
+from zeep.helpers import serialize_object
+
+from ..api import DPDAPI
+from ..infoapi import DPDInfoAPI
+from .cache import DjangoWSDLCache, cache_key, dpd_cache
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _get_client(key, factory):
+    '''
+        One client per process - reused by all requests and threads.
+        Forked workers get their own (pid is part of the key).
+    '''
+
+    key = (os.getpid(),) + key
+
+    if key not in _clients:
+        with _lock:
+            if key not in _clients:
+                _clients[key] = factory()
+
+    return _clients[key]
+
+
+def transport():
+    return zeep.Transport(
+        cache=DjangoWSDLCache(),
+        operation_timeout=getattr(settings, 'DPD_OPERATION_TIMEOUT', None)
+    )
+
+
+def get_api(useTest=False):
+    '''
+        Shared DPDAPI - use .context(...) for per call sender / generation policy.
+    '''
+
+    def factory():
+        api = DPDAPI(useTest=useTest, settings=settings, transport=transport())
+
+        pickup_address = getattr(settings, 'DPD_PICKUP_ADDRESS', None)
+        pickup_address and api.setPickupAddress(pickup_address)
+
+        return api
+
+    return _get_client(('api', useTest), factory)
+
+
+def get_info_api(xmlMode=False):
+    return _get_client(
+        ('info', xmlMode),
+        lambda: DPDInfoAPI(settings=settings, xmlMode=xmlMode, transport=transport())
+    )
+
+
+def find_postal_code(zipCode, countryCode='PL', useTest=False):
+    '''
+        findPostalCode cached in Django cache - DPD_POSTAL_CODE_CACHE_TIMEOUT (default one day).
+    '''
+
+    key = cache_key('postal', countryCode, zipCode.replace('-', ''), useTest)
+    response = dpd_cache().get(key)
+
+    if response is None:
+        response = serialize_object(get_api(useTest).findPostalCode(zipCode, countryCode), dict)
+        dpd_cache().set(key, response, getattr(settings, 'DPD_POSTAL_CODE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+    return response
+
+
+def events_for_waybill(waybill, getAll=True, language='PL'):
+    '''
+        getEventsForWaybill cached in Django cache - DPD_TRACKING_CACHE_TIMEOUT (default 5 minutes).
+    '''
+
+    key = cache_key('tracking', waybill, getAll, language)
+    response = dpd_cache().get(key)
+
+    if response is None:
+        response = serialize_object(get_info_api().getEventsForWaybill(waybill, getAll, language), dict)
+        dpd_cache().set(key, response, getattr(settings, 'DPD_TRACKING_CACHE_TIMEOUT', 60 * 5))
+
+    return response
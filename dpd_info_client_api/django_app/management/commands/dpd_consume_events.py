@@ -0,0 +1,54 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...clients import get_info_api
+from ...signals import dpd_event_received
+from ....tracking import DPDTrackingStore
+
+
+class Command(BaseCommand):
+    help = 'Long running DPD event feed consumer - sends dpd_event_received for every event and confirms the batch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='events per request')
+        parser.add_argument('--interval', type=float, default=60, help='seconds to wait when feed is empty')
+        parser.add_argument('--language', default='PL')
+        parser.add_argument('--once', action='store_true', help='drain the feed and exit')
+
+    def handle(self, *args, **options):
+        self.running = True
+
+        def stop(signum, frame):
+            self.running = False
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        infoApi = get_info_api()
+        total = 0
+
+        while self.running:
+            response = infoApi.getEventsForCustomer(options['limit'], options['language'])
+            events = DPDTrackingStore.eventsFrom(response)
+
+            for event in events:
+                dpd_event_received.send(sender=infoApi.__class__, event=event)
+
+            confirmId = getattr(response, 'confirmId', None)
+
+            if events and confirmId:
+                infoApi.confirmEventRecieved(confirmId)
+
+            total += len(events)
+            self.stdout.write('%d events processed (%d total)' % (len(events), total))
+
+            if len(events) < options['limit']:
+                if options['once']:
+                    break
+
+                #sleep in small steps so SIGTERM is handled quickly
+                deadline = time.monotonic() + options['interval']
+                while self.running and time.monotonic() < deadline:
+                    time.sleep(min(1, deadline - time.monotonic()))
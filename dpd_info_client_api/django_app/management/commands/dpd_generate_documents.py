@@ -0,0 +1,75 @@
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...clients import get_api
+from ....labels import DPDFileSpool, DPDLabelSpooler, labelsForWaybills
+
+
+def read_waybills(path):
+    fh = sys.stdin if path == '-' else open(path)
+
+    with fh:
+        for line in fh:
+            waybill = line.strip()
+            if waybill:
+                yield waybill
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Bulk label / protocol generation for waybills read line by line from file or stdin.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['labels', 'protocol'])
+        parser.add_argument('--input', default='-', help='file with one waybill per line, - for stdin')
+        parser.add_argument('--output', required=True, help='output directory')
+        parser.add_argument('--format', default='PDF', choices=['PDF', 'TIFF', 'PS', 'EPL', 'ZPL'])
+        parser.add_argument('--page-format', default='LBL_PRINTER', choices=['A4', 'LBL_PRINTER'])
+        parser.add_argument('--batch-size', type=int, default=500, help='labels per print job / waybills per protocol')
+        parser.add_argument('--test', action='store_true', help='use sandbox')
+
+    def handle(self, *args, **options):
+        api = get_api(useTest=options['test'])
+        waybills = read_waybills(options['input'])
+        start = time.monotonic()
+
+        if options['kind'] == 'labels':
+            with DPDLabelSpooler(DPDFileSpool(options['output']), options['format'], options['batch_size']) as spooler:
+                spooler.extend(labelsForWaybills(
+                    api, waybills, outputDocFormat=options['format'], docPageFormat=options['page_format']
+                ))
+
+            count, jobs = spooler.labels, spooler.jobs
+        else:
+            spool = DPDFileSpool(options['output'], prefix='protocol')
+            count = 0
+
+            for batch in batches(waybills, options['batch_size']):
+                response = api.generateProtocol(
+                    batch, outputDocFormat=options['format'], docPageFormat=options['page_format']
+                )
+
+                handle, path = tempfile.mkstemp()
+                with os.fdopen(handle, 'wb') as fh:
+                    fh.write(response.documentData)
+
+                spool.submit(path, options['format'])
+                count += len(batch)
+
+            jobs = spool.paths
+
+        self.stdout.write('%d waybills -> %d files in %.1fs' % (count, len(jobs), time.monotonic() - start))
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+#sent by dpd_consume_events for every event - sender=DPDInfoAPI, event=dict
+dpd_event_received = Signal()
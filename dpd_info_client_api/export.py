@@ -0,0 +1,301 @@
+import csv
+import os
+import sys
+import json
+import datetime
+from decimal import Decimal
+
+from zeep.helpers import serialize_object
+
+from .tracking import DPDTrackingStore
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+#repetitive fields - interned and dictionary encoded
+DICTIONARY_FIELDS = ['businessCode', 'country', 'depot', 'depotName', 'description', 'objectId']
+
+SCALAR_TYPES = (str, int, float, bool, Decimal, datetime.date, datetime.datetime)
+
+
+def eventRow(event, columns=None):
+    '''
+        Flat dict from zeep event (or dict) - nested values are dumped to JSON.
+    '''
+
+    keys = columns or list(event)
+    row = {}
+
+    for key in keys:
+        value = event[key] if key in event else None
+
+        if value is not None and not isinstance(value, SCALAR_TYPES):
+            value = serialize_object(value, dict)
+
+            if not isinstance(value, SCALAR_TYPES):
+                value = json.dumps(value, default=str)
+
+        row[key] = value
+
+    return row
+
+
+class DPDEventExporter(object):
+    '''
+        Batched export of tracking events for analytics. Existing exports are never overwritten.
+
+        format:
+            parquet - dictionary encoded columns (pyarrow required), schema comes from the first batch -
+                      columns empty there are text, later values are cast to the schema.
+                      Path of existing file raises FileExistsError, for directory new part file is written
+                      (part-<time>-<pid>.parquet)
+            ndjson - dictionary fields as codes, {"_dict": field, "code": n, "value": v} line before first use,
+                     appended to existing file
+            csv - dictionary fields as codes, dictionary in path + '.dict.csv', both appended to -
+                  existing header and codes are kept
+            None - parquet when pyarrow is installed, ndjson otherwise
+    '''
+
+    FORMATS = ['parquet', 'ndjson', 'csv']
+
+    def __init__(self, path, format=None, batchSize=10000, dictionaryFields=DICTIONARY_FIELDS):
+        format = format or ('parquet' if pyarrow else 'ndjson')
+
+        if format not in self.FORMATS:
+            raise ValueError('format should be one of: %s' % ",".join(self.FORMATS))
+
+        if format == 'parquet' and pyarrow is None:
+            raise ImportError('Parquet export requires pyarrow - pip install pyarrow')
+
+        if format == 'parquet' and os.path.isdir(path):
+            path = os.path.join(path, 'part-%s-%d.parquet' % (datetime.datetime.now().strftime('%Y%m%d%H%M%S%f'), os.getpid()))
+
+        #parquet files can't be appended to - checked before any events are fetched
+        if format == 'parquet' and os.path.exists(path):
+            raise FileExistsError('%s already exists - pass a directory to write a new part file' % path)
+
+        self.path = path
+        self.format = format
+        self.batchSize = batchSize
+        self.dictionaryFields = set(dictionaryFields)
+
+        self.columns = None
+        self.batch = []
+        self.count = 0
+
+        self.codes = dict((field, {}) for field in self.dictionaryFields)
+
+        self.fh = None
+        self.dict_fh = None
+        self.writer = None
+
+    def add(self, event):
+        row = eventRow(event, self.columns)
+
+        if self.columns is None:
+            self.columns = list(row)
+
+        for field in self.dictionaryFields:
+            if isinstance(row.get(field), str):
+                row[field] = sys.intern(row[field])
+
+        self.batch.append(row)
+        self.count += 1
+
+        if len(self.batch) >= self.batchSize:
+            self.flush()
+
+    def extend(self, events):
+        '''
+            Events or whole getEventsForCustomerV4 / getEventsForWaybillV1 response.
+        '''
+
+        if hasattr(events, 'eventsList'):
+            events = DPDTrackingStore.eventsFrom(events)
+
+        for event in events:
+            self.add(event)
+
+        return self
+
+    def code(self, field, value, new_values):
+        codes = self.codes[field]
+
+        if value not in codes:
+            codes[value] = len(codes)
+            new_values.append((field, codes[value], value))
+
+        return codes[value]
+
+    def flush(self):
+        if not self.batch:
+            return
+
+        getattr(self, 'write_%s' % self.format)(self.batch)
+        self.batch = []
+
+    def column_array(self, column, values, field=None):
+        '''
+            Arrow array for column values - cast to field type when schema is already fixed.
+        '''
+
+        try:
+            array = pyarrow.array(values)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            #mixed types in one column - keep them as text
+            array = pyarrow.array([None if v is None else str(v) for v in values], pyarrow.string())
+
+        if field is None:
+            #empty in first batch - assume string, later values are cast to it
+            if pyarrow.types.is_null(array.type):
+                array = array.cast(pyarrow.string())
+
+            if column in self.dictionaryFields and pyarrow.types.is_string(array.type):
+                array = array.dictionary_encode()
+
+            return array
+
+        target = field.type.value_type if pyarrow.types.is_dictionary(field.type) else field.type
+
+        if array.type != target:
+            try:
+                array = array.cast(target)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError):
+                if not pyarrow.types.is_string(target):
+                    raise
+
+                array = pyarrow.array([None if v is None else str(v) for v in values], pyarrow.string())
+
+        if pyarrow.types.is_dictionary(field.type):
+            array = array.dictionary_encode().cast(field.type)
+
+        return array
+
+    def write_parquet(self, rows):
+        schema = self.writer.schema if self.writer is not None else None
+
+        arrays = [
+            self.column_array(column, [row.get(column) for row in rows], schema and schema.field(column))
+            for column in self.columns
+        ]
+
+        if schema is None:
+            table = pyarrow.Table.from_arrays(arrays, names=self.columns)
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        else:
+            table = pyarrow.Table.from_arrays(arrays, schema=schema)
+
+        self.writer.write_table(table)
+
+    def write_ndjson(self, rows):
+        if self.fh is None:
+            #codes are declared again in the appended part - readNDJSON decodes in file order
+            self.fh = open(self.path, 'a')
+
+        lines = []
+
+        for row in rows:
+            new_values = []
+
+            for field in self.dictionaryFields:
+                if row.get(field) is not None:
+                    row[field] = self.code(field, row[field], new_values)
+
+            for field, code, value in new_values:
+                lines.append(json.dumps({'_dict': field, 'code': code, 'value': value}))
+
+            lines.append(json.dumps(row, default=str))
+
+        self.fh.write('\n'.join(lines) + '\n')
+
+    def write_csv(self, rows):
+        if self.fh is None:
+            self.open_csv()
+
+        new_values = []
+
+        for row in rows:
+            for field in self.dictionaryFields:
+                if row.get(field) is not None:
+                    row[field] = self.code(field, row[field], new_values)
+
+        self.dict_csv.writerows(new_values)
+        self.csv.writerows(rows)
+
+    def open_csv(self):
+        '''
+            Appends to existing export - keeps its columns and continues its dictionary codes.
+        '''
+
+        columns = self.columns
+
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            with open(self.path, newline='') as fh:
+                columns = next(csv.reader(fh))
+
+            self.fh = open(self.path, 'a', newline='')
+            self.csv = csv.DictWriter(self.fh, columns, extrasaction='ignore')
+        else:
+            self.fh = open(self.path, 'w', newline='')
+            self.csv = csv.DictWriter(self.fh, columns, extrasaction='ignore')
+            self.csv.writeheader()
+
+        dict_path = self.path + '.dict.csv'
+
+        if os.path.exists(dict_path) and os.path.getsize(dict_path):
+            with open(dict_path, newline='') as fh:
+                reader = csv.reader(fh)
+                next(reader)
+
+                for field, code, value in reader:
+                    self.codes.setdefault(field, {})[value] = int(code)
+
+            self.dict_fh = open(dict_path, 'a', newline='')
+            self.dict_csv = csv.writer(self.dict_fh)
+        else:
+            self.dict_fh = open(dict_path, 'w', newline='')
+            self.dict_csv = csv.writer(self.dict_fh)
+            self.dict_csv.writerow(['field', 'code', 'value'])
+
+    def close(self):
+        self.flush()
+
+        if self.writer is not None:
+            self.writer.close()
+
+        for fh in (self.fh, self.dict_fh):
+            fh and fh.close()
+
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def readNDJSON(path):
+    '''
+        Yields events from ndjson export with dictionary codes decoded.
+    '''
+
+    dictionaries = {}
+
+    with open(path) as fh:
+        for line in fh:
+            row = json.loads(line)
+
+            if '_dict' in row:
+                dictionaries.setdefault(row['_dict'], {})[row['code']] = row['value']
+                continue
+
+            for field, values in dictionaries.items():
+                if row.get(field) is not None:
+                    row[field] = values[row[field]]
+
+            yield row
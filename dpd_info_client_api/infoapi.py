@@ -3,6 +3,8 @@ import zeep
 import logging.config
 from decimal import Decimal
 
+from .profiling import DPDProfiler
+
 
 try:
     from django.conf import settings as django_settings
@@ -21,13 +23,15 @@ class DPDInfoAPI(object):
     PROD_PASSWORD = None
 
     client = None
+    transport = None
     service = None
     factory = None
 
-    def __init__(self, initZeep=True, settings=django_settings, xmlMode=False):
+    def __init__(self, initZeep=True, settings=django_settings, xmlMode=False, transport=None):
         
         #sorry for that but i liked it from JS 
         self.xmlMode = xmlMode
+        self.transport = transport
         settings and self.set_config(settings)
         initZeep and self.init_zeep()
 
@@ -85,13 +89,24 @@ class DPDInfoAPI(object):
         self.check_config()
 
         #wrapped client
-        self.client = zeep.Client(self.PROD_API_WSDL_XML if self.xmlMode else self.PROD_API_WSDL_OBJ)
+        self.client = zeep.Client(
+            self.PROD_API_WSDL_XML if self.xmlMode else self.PROD_API_WSDL_OBJ,
+            transport=self.transport
+        )
         self.factory = self.client.type_factory('ns0')
 
         self.s = self.client.service
         self.service = self.s
         self.__attach_service_refs()
 
+    def profile(self, cprofileRate=0.0, traceMalloc=False):
+        '''
+            Opt-in per call profiling - build / serialise / network / parse split.
+            Use as context manager, report is available after the block.
+        '''
+
+        return DPDProfiler(cprofileRate, traceMalloc).attach(self)
+
     def enable_zeep_debug(self):
         '''
             Enable verbose ZEEP debugging.
@@ -146,13 +161,20 @@ class DPDInfoAPI(object):
 
         return service_method
 
+    def wrap_service_method(self, method, wrapper):
+        '''
+            Replace service method attached to instance with wrapper(service_method).
+            Wrappers stack - each one gets what was attached before.
+        '''
+
+        setattr(self, method, wrapper(getattr(self, method, None) or self.service_get(method)))
+
     def service_call_auth_proxy(self, method, *args):
         '''
             That's preety much proxied call.
         '''
         
-        any(args) and args.append(self.authPayload)
-        return self.service_get(method)(*args)
+        return self.service_get(method)(*(args + (self.authPayload,)))
     
     @property
     def authPayload(self):
@@ -0,0 +1,212 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+
+#formats that are valid when concatenated
+CONCAT_FORMATS = ['ZPL', 'EPL']
+MERGE_FORMATS = CONCAT_FORMATS + ['PDF']
+
+
+def labelsForWaybills(api, waybills, **kwargs):
+    '''
+        Streams label documents - one GenerateSpedLabel call per waybill.
+        kwargs are passed to GenerateSpedLabel (outputDocFormat, docPageFormat...).
+    '''
+
+    for waybill in waybills:
+        yield api.GenerateSpedLabel(waybill=waybill, **kwargs)
+
+
+def documentData(document):
+    '''
+        Raw bytes from generateSpedLabelsV4 response or bytes.
+    '''
+
+    if isinstance(document, (bytes, bytearray)):
+        return bytes(document)
+
+    data = getattr(document, 'documentData', None)
+
+    if data is None:
+        raise TypeError('Expected label bytes or generateSpedLabelsV4 response - got %s' % type(document))
+
+    return data
+
+
+class DPDFileSpool(object):
+    '''
+        Writes print jobs as files: directory/prefix-00001.zpl
+    '''
+
+    def __init__(self, directory, prefix='labels'):
+        self.directory = directory
+        self.prefix = prefix
+        self.count = 0
+        self.paths = []
+
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(self, path, outputDocFormat):
+        self.count += 1
+
+        target = os.path.join(
+            self.directory, '%s-%05d.%s' % (self.prefix, self.count, outputDocFormat.lower())
+        )
+
+        shutil.move(path, target)
+        self.paths.append(target)
+        return target
+
+
+class DPDPrinterSpool(object):
+    '''
+        Sends print jobs to CUPS / lpd queue.
+        ZPL / EPL are sent raw - printer gets them untouched.
+    '''
+
+    def __init__(self, queue, command='lp'):
+        self.queue = queue
+        self.command = command
+
+    def submit(self, path, outputDocFormat):
+        args = [self.command, '-d', self.queue]
+
+        if outputDocFormat in CONCAT_FORMATS:
+            args += ['-o', 'raw']
+
+        try:
+            subprocess.run(args + [path], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finally:
+            os.remove(path)
+
+        return self.queue
+
+
+class DPDLabelSpooler(object):
+    '''
+        Merges streamed label documents into print jobs.
+
+        ZPL / EPL are concatenated straight to disk, PDF pages are appended one
+        document at a time (pypdf required). At most labelsPerJob documents go
+        to one job, so memory stays bounded no matter how many labels are spooled.
+        TIFF / PS are not merged - every document is a separate job.
+    '''
+
+    def __init__(self, spool, outputDocFormat='ZPL', labelsPerJob=500):
+        if outputDocFormat == 'PDF' and PdfWriter is None:
+            raise ImportError('Merging PDF labels requires pypdf - pip install pypdf')
+
+        self.spool = spool
+        self.outputDocFormat = outputDocFormat
+        self.labelsPerJob = labelsPerJob if outputDocFormat in MERGE_FORMATS else 1
+
+        self.jobs = []
+        self.labels = 0
+
+        self.job_path = None
+        self.job_file = None
+        self.job_writer = None
+        self.job_labels = 0
+
+    def open_job(self):
+        handle, self.job_path = tempfile.mkstemp(suffix='.' + self.outputDocFormat.lower())
+
+        if self.outputDocFormat == 'PDF':
+            os.close(handle)
+            self.job_writer = PdfWriter()
+        else:
+            self.job_file = os.fdopen(handle, 'wb')
+
+        self.job_labels = 0
+
+    def add(self, document):
+        '''
+            Adds generateSpedLabelsV4 response or label bytes.
+        '''
+
+        data = documentData(document)
+
+        if self.job_path is None:
+            self.open_job()
+
+        if self.job_writer is not None:
+            self.job_writer.append(PdfReader(io.BytesIO(data)))
+        else:
+            self.job_file.write(data)
+
+            #keep commands of next label on new line
+            if self.outputDocFormat in CONCAT_FORMATS and not data.endswith(b'\n'):
+                self.job_file.write(b'\n')
+
+        self.job_labels += 1
+        self.labels += 1
+
+        if self.job_labels >= self.labelsPerJob:
+            self.close_job()
+
+    def extend(self, documents):
+        for document in documents:
+            self.add(document)
+
+        return self
+
+    def close_job(self):
+        if self.job_path is None:
+            return
+
+        if self.job_writer is not None:
+            with open(self.job_path, 'wb') as fh:
+                self.job_writer.write(fh)
+
+            self.job_writer = None
+        else:
+            self.job_file.close()
+            self.job_file = None
+
+        path, self.job_path = self.job_path, None
+        self.jobs.append(self.spool.submit(path, self.outputDocFormat))
+
+    def discard_job(self):
+        '''
+            Drops current job without submitting it - labels added since last close_job are lost.
+        '''
+
+        if self.job_path is None:
+            return
+
+        if self.job_file is not None:
+            self.job_file.close()
+            self.job_file = None
+
+        self.job_writer = None
+        self.labels -= self.job_labels
+        self.job_labels = 0
+
+        path, self.job_path = self.job_path, None
+        os.remove(path)
+
+    def close(self):
+        '''
+            Flushes the last job - returns list of submitted jobs.
+        '''
+
+        self.close_job()
+        return self.jobs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        #half filled job is not sent to the printer when the block failed
+        if exc_type is not None:
+            self.discard_job()
+        else:
+            self.close()
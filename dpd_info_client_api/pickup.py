@@ -0,0 +1,153 @@
+import datetime
+import threading
+
+from zeep.helpers import serialize_object
+
+
+class DPDPickupScheduler(object):
+    '''
+        Groups ready waybills by sender address and pickup window -
+        every group is ordered with a single pickupCall.
+
+        Use:
+            scheduler = DPDPickupScheduler(DPD_ApiInstance)
+            scheduler.add('WAYBILL1', weight=2)
+            scheduler.add('WAYBILL2', senderData=OTHER_DEPOT, weight=5)
+            scheduler.flush()
+    '''
+
+    def __init__(self, api, pickupTimeFrom='10:00', pickupTimeTo='16:00'):
+        self.api = api
+        self.pickupTimeFrom = pickupTimeFrom
+        self.pickupTimeTo = pickupTimeTo
+
+        self.lock = threading.Lock()
+        self.groups = {}
+        self.availability = {}
+
+    @staticmethod
+    def senderKey(senderData):
+        if not senderData:
+            return None
+
+        return tuple(sorted(
+            (k, v.replace('-', '') if k == 'postalCode' else v) for k, v in senderData.items()
+        ))
+
+    def add(self, waybill, senderData=None, pickupDate=None, pickupTimeFrom=None, pickupTimeTo=None, weight=None):
+        '''
+            Queue ready waybill.
+            senderData None - pickup address current in the calling thread (context included) is used.
+            pickupDate - date or 'YYYY-MM-DD', defaults to today.
+        '''
+
+        #resolved now - flush may run in other thread with other context
+        senderData = senderData or self.pickupAddressData()
+        pickupDate = pickupDate or datetime.date.today()
+
+        if isinstance(pickupDate, datetime.date):
+            pickupDate = pickupDate.isoformat()
+
+        key = (
+            self.senderKey(senderData),
+            pickupDate,
+            pickupTimeFrom or self.pickupTimeFrom,
+            pickupTimeTo or self.pickupTimeTo,
+        )
+
+        with self.lock:
+            group = self.groups.setdefault(key, {
+                'senderData': senderData,
+                'waybills': [],
+                'weights': [],
+            })
+
+            group['waybills'].append(waybill)
+            weight and group['weights'].append(weight)
+
+    def pickupAddressData(self):
+        '''
+            Current instance pickup address as dict.
+        '''
+
+        if not self.api.pickup_address:
+            raise UnboundLocalError('Sender address is not defined, either provide senderData argument or setPickupAddress')
+
+        return dict(
+            (k, v) for k, v in serialize_object(self.api.pickup_address).items() if v is not None
+        )
+
+    def pending(self):
+        '''
+            [(senderData, pickupDate, pickupTimeFrom, pickupTimeTo, waybills)]
+        '''
+
+        with self.lock:
+            return [
+                (group['senderData'], key[1], key[2], key[3], list(group['waybills']))
+                for key, group in self.groups.items()
+            ]
+
+    def flush(self, returnPayload=False):
+        '''
+            One pickupCall per group.
+            Returns list of (waybills, response) - on error groups not ordered yet are put back.
+        '''
+
+        with self.lock:
+            groups, self.groups = self.groups, {}
+
+        results = []
+        queue = list(groups.items())
+
+        while queue:
+            key, group = queue[0]
+            senderKey, pickupDate, pickupTimeFrom, pickupTimeTo = key
+
+            try:
+                response = self.api.pickupCall(
+                    group['waybills'],
+                    pickupDate,
+                    pickupTimeFrom,
+                    pickupTimeTo,
+                    senderData=group['senderData'],
+                    parcelsWeight=sum(group['weights']) or None,
+                    parcelMaxWeight=max(group['weights']) if group['weights'] else None,
+                    returnPayload=returnPayload
+                )
+            except Exception:
+                self.requeue(queue)
+                raise
+
+            queue.pop(0)
+            results.append((group['waybills'], response))
+
+        return results
+
+    def requeue(self, queue):
+        with self.lock:
+            for key, group in queue:
+                pending = self.groups.setdefault(key, {'senderData': group['senderData'], 'waybills': [], 'weights': []})
+                pending['waybills'][:0] = group['waybills']
+                pending['weights'][:0] = group['weights']
+
+    def courierAvailability(self, zipCode, countryCode='PL'):
+        '''
+            getCourierOrderAvailability cached per zip code for the day.
+        '''
+
+        key = (self.api.validateZipCode(zipCode, countryCode), countryCode, datetime.date.today())
+
+        with self.lock:
+            if key in self.availability:
+                return self.availability[key]
+
+        #not holding the lock while DPD answers - add and flush are not blocked
+        availability = self.api.getCourierOrderAvailability(zipCode, countryCode)
+
+        with self.lock:
+            #drop entries from previous days
+            self.availability = dict((k, v) for k, v in self.availability.items() if k[2] == key[2])
+            self.availability[key] = availability
+
+        return availability
@@ -0,0 +1,166 @@
+import multiprocessing
+
+import zeep
+from zeep.cache import SqliteCache
+from zeep.helpers import serialize_object
+
+from .api import DPDAPI
+from .serializer import DPDFastSerializer
+from .settings import DPDSettingsObject
+
+
+class DPDPayloadError(Exception):
+    '''
+        Shipment that could not be built in worker - yielded in place of its envelope / response.
+    '''
+    pass
+
+
+#worker process state - set up once by _init_worker
+_worker_api = None
+
+
+def _init_worker(settings, useTest, wsdl_url, pickup_address, generation_policy, cache, fast):
+    '''
+        Warm up worker - load schema, compile serializer, set sender and generation policy once.
+        cache - (path, timeout) of parent transport SqliteCache, WSDL is not downloaded again.
+    '''
+
+    global _worker_api
+
+    settingsObject = DPDSettingsObject()
+
+    for k, v in settings.items():
+        setattr(settingsObject, k, v)
+
+    transport = zeep.Transport(cache=SqliteCache(*cache)) if cache else None
+    api = DPDAPI(useTest=useTest, initZeep=False, settings=settingsObject, transport=transport)
+
+    if useTest:
+        api.SANDBOX_API_WSDL = wsdl_url
+    else:
+        api.PROD_API_WSDL = wsdl_url
+
+    api.init_zeep()
+
+    if fast:
+        api.enable_fast_serializer(operations=('generatePackagesNumbersV4',))
+    else:
+        api.fast_serializer = DPDFastSerializer(api, operations=())
+
+    pickup_address and api.setPickupAddress(pickup_address)
+    api.setGenerationPolicy(generation_policy)
+
+    _worker_api = api
+
+
+def _build_shipment(shipment):
+    '''
+        Shipment kwargs -> serialized generatePackagesNumbersV4 envelope.
+    '''
+
+    try:
+        payload = _worker_api.GenerateSingleParcelShipment(returnPayload=True, **shipment)
+
+        #first envelope of every worker is verified against zeep
+        return _worker_api.fast_serializer.message('generatePackagesNumbersV4', *payload)
+    except Exception as e:
+        #zeep exceptions do not always pickle - send plain message back
+        return DPDPayloadError('%s: %s' % (type(e).__name__, e))
+
+
+class DPDPayloadPool(object):
+    '''
+        Builds and serializes shipment payloads in worker processes.
+
+        Workers get the schema once on start, take plain dict input and
+        return ready envelopes - the parent process only posts them.
+
+        Sender and generation policy are taken from api when the pool is created (context included).
+        Every worker loads the WSDL on start - unless api transport has zeep SqliteCache,
+        which workers share.
+    '''
+
+    def __init__(self, api, processes=None, chunksize=64, fast=True):
+        '''
+            api - configured DPDAPI instance used for sending and as config source.
+            processes - number of workers (defaults to cpu count).
+            chunksize - shipments sent to worker in one go.
+            fast - render with DPDFastSerializer in workers.
+        '''
+
+        self.api = api
+        self.chunksize = chunksize
+        self.sender = api.fast_serializer or DPDFastSerializer(api, operations=())
+
+        settings = {
+            'DPD_API_USERNAME': api.PROD_USERNAME,
+            'DPD_API_PASSWORD': api.PROD_PASSWORD,
+            'DPD_API_FID': api.PROD_FID,
+            'DPD_API_SANDBOX_USERNAME': api.SANDBOX_USERNAME,
+            'DPD_API_SANDBOX_PASSWORD': api.SANDBOX_PASSWORD,
+            'DPD_API_SANDBOX_FID': api.SANDBOX_FID,
+        }
+
+        self.pool = multiprocessing.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(
+                settings, api.useTest, api.wsdl_url, self.pickupAddressData, api.generation_policy, self.transportCache, fast
+            )
+        )
+
+    @property
+    def transportCache(self):
+        '''
+            (path, timeout) of api transport SqliteCache - other caches do not cross processes.
+        '''
+
+        cache = getattr(self.api.transport, 'cache', None)
+
+        if not isinstance(cache, SqliteCache):
+            return None
+
+        return cache._db_path, cache._timeout
+
+    @property
+    def pickupAddressData(self):
+        '''
+            Instance pickup address as picklable dict.
+        '''
+
+        if not self.api.pickup_address:
+            return None
+
+        return dict(
+            (k, v) for k, v in serialize_object(self.api.pickup_address).items() if v is not None
+        )
+
+    def buildMessages(self, shipments):
+        '''
+            Yields envelopes in input order - DPDPayloadError for shipments that could not be built.
+            Each shipment is a dict of GenerateSingleParcelShipment kwargs - packageData, recieverData, servicesData...
+        '''
+
+        return self.pool.imap(_build_shipment, shipments, self.chunksize)
+
+    def generateShipments(self, shipments):
+        '''
+            Yields generatePackagesNumbersV4 responses in input order - DPDPayloadError for shipments that could not be built.
+        '''
+
+        for message in self.buildMessages(shipments):
+            if isinstance(message, DPDPayloadError):
+                yield message
+            else:
+                yield self.sender.send('generatePackagesNumbersV4', message)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
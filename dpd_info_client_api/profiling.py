@@ -0,0 +1,295 @@
+import cProfile
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+
+PHASES = ['build', 'serialise', 'network', 'parse', 'total']
+
+
+def percentile(values, p):
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+class DPDProfiler(object):
+    '''
+        Per call timing split into phases:
+
+            build - payload construction in wrapper methods (GenerateSingleParcelShipment...)
+            serialise - envelope rendering (zeep or fast serializer)
+            network - HTTP post to DPD
+            parse - reply parsing by zeep
+
+        cprofileRate - fraction of calls sampled with cProfile (0 - off).
+        traceMalloc - record peak memory per call - bytes above the start of the call (Python 3.9+,
+                      tracemalloc is process wide, best with single thread).
+
+        Use:
+            with DPD_ApiInstance.profile(cprofileRate=0.05) as profiler:
+                ...
+            profiler.dumpJSON('profile.json')
+    '''
+
+    PUBLIC_METHODS = [
+        'GenerateSingleParcelShipment',
+        'GenerateSpedLabel',
+        'generateProtocol',
+        'pickupCall',
+        'findPostalCode',
+        'getCourierOrderAvailability',
+        'getEventsForCustomer',
+        'getEventsForWaybill',
+        'confirmEventRecieved',
+    ]
+
+    def __init__(self, cprofileRate=0.0, traceMalloc=False):
+        if traceMalloc and not hasattr(tracemalloc, 'reset_peak'):
+            raise RuntimeError('traceMalloc requires Python 3.9+ (tracemalloc.reset_peak)')
+
+        self.cprofileRate = cprofileRate
+        self.traceMalloc = traceMalloc
+
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+        self.cprofile_stats = None
+        self.cprofile_lock = threading.Lock()
+
+        self.api = None
+        self.restore = []
+
+    #attaching
+
+    def attach(self, api):
+        self.api = api
+
+        for name in self.PUBLIC_METHODS:
+            if hasattr(api, name):
+                self.patch(api, name, self.wrap_public(name, getattr(api, name)))
+
+        for name in dir(api.service):
+            if not name.startswith('__') and name in api.__dict__:
+                self.patch(api, name, self.wrap_operation(name, getattr(api, name)))
+
+        binding = api.client.service._binding
+        self.patch(binding, '_create', self.wrap_phase('serialise', binding._create))
+        self.patch(binding, 'process_reply', self.wrap_phase('parse', binding.process_reply))
+        self.patch(api.client.transport, 'post', self.wrap_phase('network', api.client.transport.post))
+
+        if api.__dict__.get('fast_serializer'):
+            serializer = api.fast_serializer
+            self.patch(serializer, 'render', self.wrap_phase('serialise', serializer.render))
+
+        if self.traceMalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.restore.append(tracemalloc.stop)
+
+        return self
+
+    def patch(self, obj, name, value):
+        if name in obj.__dict__:
+            previous = obj.__dict__[name]
+            self.restore.append(lambda: setattr(obj, name, previous))
+        else:
+            self.restore.append(lambda: delattr(obj, name))
+
+        setattr(obj, name, value)
+
+    def detach(self):
+        while self.restore:
+            self.restore.pop()()
+
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.detach()
+
+    #per call state
+
+    def start_call(self, name):
+        record = {
+            'method': name,
+            'operation': name,
+            'start': time.perf_counter(),
+            'mark': time.perf_counter(),
+            'error': False,
+        }
+
+        for phase in PHASES:
+            record[phase] = 0.0
+
+        if self.traceMalloc:
+            tracemalloc.reset_peak()
+            record['memory'] = tracemalloc.get_traced_memory()[0]
+
+        record['profile'] = None
+
+        if self.cprofileRate and random.random() < self.cprofileRate and self.cprofile_lock.acquire(False):
+            try:
+                record['profile'] = cProfile.Profile()
+                record['profile'].enable()
+            except ValueError:
+                #other profiler is active - skip the sample
+                record['profile'] = None
+                self.cprofile_lock.release()
+
+        self.local.record = record
+        return record
+
+    def end_call(self, record):
+        self.local.record = None
+        record['total'] = time.perf_counter() - record.pop('start')
+        record.pop('mark')
+
+        if self.traceMalloc:
+            record['memory'] = tracemalloc.get_traced_memory()[1] - record['memory']
+
+        profile = record.pop('profile')
+
+        if profile is not None:
+            profile.disable()
+
+            with self.lock:
+                if self.cprofile_stats is None:
+                    self.cprofile_stats = pstats.Stats(profile)
+                else:
+                    self.cprofile_stats.add(profile)
+
+            self.cprofile_lock.release()
+
+        with self.lock:
+            self.records.append(record)
+
+    def current(self):
+        return getattr(self.local, 'record', None)
+
+    def wrap_call(self, name, method, is_operation):
+        def profiled(*args, **kwargs):
+            record = self.current()
+
+            if record is not None:
+                if is_operation:
+                    #time since wrapper started / previous operation - payload building
+                    record['operation'] = name
+                    record['build'] += time.perf_counter() - record['mark']
+
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    if is_operation:
+                        record['mark'] = time.perf_counter()
+
+            record = self.start_call(name)
+
+            try:
+                return method(*args, **kwargs)
+            except Exception:
+                record['error'] = True
+                raise
+            finally:
+                if not is_operation:
+                    record['build'] += time.perf_counter() - record['mark']
+
+                self.end_call(record)
+
+        profiled.__name__ = name
+        return profiled
+
+    def wrap_public(self, name, method):
+        return self.wrap_call(name, method, False)
+
+    def wrap_operation(self, name, method):
+        return self.wrap_call(name, method, True)
+
+    def wrap_phase(self, phase, method):
+        def profiled_phase(*args, **kwargs):
+            start = time.perf_counter()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record = self.current()
+
+                if record is not None:
+                    record[phase] += time.perf_counter() - start
+
+        return profiled_phase
+
+    #reporting
+
+    def report(self, top=10):
+        '''
+            {'operations': {operation: stats}, 'top': [operations by total time]}
+        '''
+
+        with self.lock:
+            records = list(self.records)
+
+        operations = {}
+
+        for record in records:
+            operations.setdefault(record['operation'], []).append(record)
+
+        report = {'calls': len(records), 'operations': {}}
+
+        for operation, calls in operations.items():
+            stats = {
+                'count': len(calls),
+                'errors': sum(1 for c in calls if c['error']),
+            }
+
+            for phase in PHASES:
+                values = [c[phase] for c in calls]
+                stats[phase] = {
+                    'sum': sum(values),
+                    'mean': sum(values) / len(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'p99': percentile(values, 99),
+                    'max': max(values),
+                }
+
+            if self.traceMalloc:
+                values = [c['memory'] for c in calls]
+                stats['memory'] = {
+                    'mean': sum(values) / len(values),
+                    'p95': percentile(values, 95),
+                    'max': max(values),
+                }
+
+            report['operations'][operation] = stats
+
+        report['top'] = sorted(
+            report['operations'], key=lambda o: report['operations'][o]['total']['sum'], reverse=True
+        )[:top]
+
+        return report
+
+    def dumpJSON(self, path, top=10):
+        with open(path, 'w') as fh:
+            json.dump(self.report(top), fh, indent=2)
+
+    def printStats(self, limit=30, sort='cumulative', stream=None):
+        '''
+            Aggregated cProfile stats of sampled calls written to stream (sys.stdout by default).
+            Returns False when nothing was sampled.
+        '''
+
+        if self.cprofile_stats is None:
+            return False
+
+        self.cprofile_stats.stream = stream or sys.stdout
+        self.cprofile_stats.sort_stats(sort).print_stats(limit)
+        return True
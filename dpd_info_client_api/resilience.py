@@ -0,0 +1,254 @@
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from zeep.exceptions import TransportError
+
+
+class DPDCircuitOpenError(Exception):
+    '''
+        Raised instead of calling DPD while the operation circuit is open.
+    '''
+    pass
+
+
+class DPDOperationCircuit(object):
+    '''
+        State of single operation circuit.
+    '''
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, windowSize):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.latencies = collections.deque(maxlen=windowSize)
+        self.cache = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def p95(self, minSamples):
+        if len(self.latencies) < minSamples:
+            return None
+
+        latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+
+class DPDCircuitBreaker(object):
+    '''
+        Per operation circuit breaker with optional hedged requests.
+
+        failureThreshold - consecutive failed (or slow) calls that open the circuit.
+        latencyThreshold - seconds, slower calls count as failures (None - latency is ignored).
+        resetTimeout - seconds the circuit stays open before half open probe.
+        serveCached - while open return last good response for the same arguments.
+        hedgeDelay - seconds before second attempt when there is not enough latency samples,
+                     after that p95 of recent calls is used.
+        hedgeWorkers - hedges in flight at once, calls over the limit are not hedged.
+    '''
+
+    #errors that mean DPD is in trouble - soap faults are valid answers
+    FAILURE_EXCEPTIONS = (requests.RequestException, TransportError)
+
+    def __init__(self,
+            failureThreshold=5,
+            latencyThreshold=None,
+            resetTimeout=30,
+            serveCached=True,
+            cacheSize=1024,
+            windowSize=100,
+            hedgeDelay=1.0,
+            hedgeMinSamples=20,
+            hedgeWorkers=8
+        ):
+
+        self.failureThreshold = failureThreshold
+        self.latencyThreshold = latencyThreshold
+        self.resetTimeout = resetTimeout
+        self.serveCached = serveCached
+        self.cacheSize = cacheSize
+        self.windowSize = windowSize
+        self.hedgeDelay = hedgeDelay
+        self.hedgeMinSamples = hedgeMinSamples
+        self.hedgeWorkers = hedgeWorkers
+
+        self.circuits = {}
+        self.lock = threading.Lock()
+        self.executor = None
+        self.hedge_slots = None
+
+    def circuit(self, operation):
+        with self.lock:
+            if operation not in self.circuits:
+                self.circuits[operation] = DPDOperationCircuit(self.windowSize)
+
+            return self.circuits[operation]
+
+    def state(self, operation):
+        return self.circuit(operation).state
+
+    def protect(self, api, operations, hedge=False):
+        '''
+            Wraps service methods on DPDAPI / DPDInfoAPI instance.
+            hedge - only for idempotent read operations.
+        '''
+
+        for operation in operations:
+            api.wrap_service_method(
+                operation,
+                lambda service_method, operation=operation: self.wrap(operation, service_method, hedge)
+            )
+
+    def wrap(self, operation, service_method, hedge=False):
+        def protected_operation(*args):
+            return self.call(operation, service_method, args, hedge)
+
+        protected_operation.__name__ = operation
+        return protected_operation
+
+    def cache_key(self, args):
+        #last argument is always authData
+        return repr(args[:-1])
+
+    def before_call(self, circuit, operation, key):
+        '''
+            Returns (allowed, cached_response).
+        '''
+
+        with circuit.lock:
+            if circuit.state == circuit.OPEN and time.monotonic() - circuit.opened_at >= self.resetTimeout:
+                circuit.state = circuit.HALF_OPEN
+
+            if circuit.state == circuit.CLOSED:
+                return True, None
+
+            if circuit.state == circuit.HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return True, None
+
+        if self.serveCached and key in circuit.cache:
+            return False, circuit.cache[key]
+
+        raise DPDCircuitOpenError('Circuit for %s is %s' % (operation, circuit.state))
+
+    def after_call(self, circuit, key, latency, response=None, failed=False):
+        slow = self.latencyThreshold is not None and latency > self.latencyThreshold
+
+        with circuit.lock:
+            circuit.probing = False
+
+            if not failed:
+                circuit.latencies.append(latency)
+
+                if self.serveCached:
+                    circuit.cache[key] = response
+                    circuit.cache.move_to_end(key)
+
+                    while len(circuit.cache) > self.cacheSize:
+                        circuit.cache.popitem(last=False)
+
+            if failed or slow:
+                circuit.failures += 1
+
+                if circuit.state == circuit.HALF_OPEN or circuit.failures >= self.failureThreshold:
+                    circuit.state = circuit.OPEN
+                    circuit.opened_at = time.monotonic()
+            else:
+                circuit.failures = 0
+                circuit.state = circuit.CLOSED
+
+    def release(self, circuit):
+        '''
+            DPD answered with soap fault - it works, close the circuit but cache nothing.
+        '''
+
+        with circuit.lock:
+            circuit.probing = False
+            circuit.failures = 0
+            circuit.state = circuit.CLOSED
+
+    def call(self, operation, service_method, args, hedge=False):
+        circuit = self.circuit(operation)
+        key = self.cache_key(args)
+
+        allowed, cached = self.before_call(circuit, operation, key)
+
+        if not allowed:
+            return cached
+
+        start = time.monotonic()
+
+        try:
+            if hedge:
+                response, latency = self.hedged_call(circuit, service_method, args)
+            else:
+                response = service_method(*args)
+                latency = time.monotonic() - start
+        except self.FAILURE_EXCEPTIONS:
+            self.after_call(circuit, key, time.monotonic() - start, failed=True)
+            raise
+        except Exception:
+            #soap fault or validation - DPD works, release the probe
+            self.release(circuit)
+            raise
+
+        self.after_call(circuit, key, latency, response)
+        return response
+
+    def hedged_call(self, circuit, service_method, args):
+        '''
+            First attempt runs on the caller's thread, second one is sent by a hedge worker
+            when the first is still running after recent p95. When no hedge worker is free
+            the call is not hedged - hedges never wait in a queue.
+
+            Caller's attempt cannot be interrupted, so hedge answer is used when the first
+            attempt fails with connection error or timeout after the hedge was sent.
+
+            Returns (response, latency) - latency of the attempt that answered, from its start.
+        '''
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.hedgeWorkers)
+                self.hedge_slots = threading.BoundedSemaphore(self.hedgeWorkers)
+
+        delay = circuit.p95(self.hedgeMinSamples) or self.hedgeDelay
+        finished = threading.Event()
+        future = None
+
+        def hedge_attempt():
+            try:
+                if finished.wait(delay):
+                    return None
+
+                start = time.monotonic()
+                response = service_method(*args)
+                return response, time.monotonic() - start
+            finally:
+                self.hedge_slots.release()
+
+        if self.hedge_slots.acquire(False):
+            future = self.executor.submit(hedge_attempt)
+
+        start = time.monotonic()
+
+        try:
+            response = service_method(*args)
+        except self.FAILURE_EXCEPTIONS:
+            finished.set()
+
+            #hedge was sent before the first attempt failed - its answer wins
+            if future is not None and future.exception() is None and future.result() is not None:
+                return future.result()
+
+            raise
+        finally:
+            finished.set()
+
+        return response, time.monotonic() - start
@@ -0,0 +1,240 @@
+import logging
+
+import zeep
+from lxml import etree
+
+
+logger = logging.getLogger(__name__)
+
+SOAP_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+
+class DPDFastSerializer(object):
+    '''
+        Direct SOAP envelope writer for the hot DPD operations.
+
+        Rendering plans are compiled once from the zeep schema, after that
+        envelopes are written straight from plain dicts (or zeep objects)
+        with lxml - skipping zeep's generic validation and rendering.
+        Every other operation goes through zeep as usual.
+    '''
+
+    FAST_OPERATIONS = ('generatePackagesNumbersV4', 'generateSpedLabelsV4')
+
+    def __init__(self, api, operations=FAST_OPERATIONS, verify=True):
+        '''
+            api - initialized DPDAPI (or DPDInfoAPI) instance.
+            operations - operation names served by the fast path.
+            verify - compare first envelope of every operation with zeep output
+                     and fall back to zeep for good if they differ.
+        '''
+
+        assert api.client, "Client is unavaliable, please provide valid settings via .set_config(settings) and run .init_zeep() on instance"
+
+        self.api = api
+        self.verify = verify
+        self.binding = api.client.service._binding
+
+        self.plans = {}
+        self.verified = {}
+
+        for operation in operations:
+            self.plans[operation] = self.compile_operation(operation)
+
+    @property
+    def authData(self):
+        '''
+            Auth data as plain dict - for building payloads without factory.
+        '''
+
+        return {
+            'login': self.api.API_USERNAME,
+            'password': self.api.API_PASSWORD,
+            'masterFid': self.api.API_FID
+        }
+
+    def compile_operation(self, operation):
+        '''
+            Builds rendering plan for the operation input wrapper element.
+        '''
+
+        operation_obj = self.binding.get(operation)
+
+        if operation_obj is None:
+            raise ValueError('Service does not provide the %s method' % operation)
+
+        body = operation_obj.input.body
+
+        return {
+            'qname': body.qname,
+            'args': compile_plan(body.type, {})
+        }
+
+    def http_headers(self, operation):
+        '''
+            Same SOAP 1.1 headers zeep sends with the envelope.
+        '''
+
+        soapaction = self.binding.get(operation).soapaction
+
+        headers = {
+            'SOAPAction': '"%s"' % soapaction if soapaction else '""',
+            'Content-Type': 'text/xml; charset=utf-8'
+        }
+
+        if self.api.client.settings.extra_http_headers:
+            headers.update(self.api.client.settings.extra_http_headers)
+
+        return headers
+
+    def is_fast(self, operation):
+        return operation in self.plans and self.verified.get(operation) is not False
+
+    def create_envelope(self, operation, *args):
+        '''
+            Renders the envelope element from positional operation args.
+        '''
+
+        plan = self.plans[operation]
+
+        if len(args) > len(plan['args']):
+            raise TypeError('%s takes at most %d arguments (%d given)' % (operation, len(plan['args']), len(args)))
+
+        envelope = etree.Element(etree.QName(SOAP_ENV_NS, 'Envelope'), nsmap={'soap-env': SOAP_ENV_NS})
+        body = etree.SubElement(envelope, etree.QName(SOAP_ENV_NS, 'Body'))
+        wrapper = etree.SubElement(body, plan['qname'])
+
+        render_plan(wrapper, plan['args'], dict(zip([p[0] for p in plan['args']], args)))
+
+        return envelope
+
+    def render(self, operation, *args):
+        '''
+            Envelope as bytes - exactly as zeep would post it.
+        '''
+
+        return etree.tostring(
+            self.create_envelope(operation, *args),
+            pretty_print=False, xml_declaration=True, encoding='utf-8'
+        )
+
+    def render_zeep(self, operation, *args):
+        '''
+            Reference envelope rendered by zeep itself.
+        '''
+
+        return etree.tostring(
+            self.api.client.create_message(self.api.client.service, operation, *args),
+            pretty_print=False, xml_declaration=True, encoding='utf-8'
+        )
+
+    def check(self, operation, *args):
+        '''
+            Byte for byte comparison of fast and zeep envelopes.
+        '''
+
+        return self.render(operation, *args) == self.render_zeep(operation, *args)
+
+    def message(self, operation, *args):
+        '''
+            Envelope bytes to post - fast when possible.
+            With verify first envelope of every operation is compared with zeep
+            and on difference zeep output is used from then on.
+        '''
+
+        if not self.is_fast(operation):
+            return self.render_zeep(operation, *args)
+
+        message = self.render(operation, *args)
+
+        if self.verify and operation not in self.verified:
+            reference = self.render_zeep(operation, *args)
+            self.verified[operation] = message == reference
+
+            if not self.verified[operation]:
+                logger.warning('Fast serializer output differs from zeep for %s - falling back to zeep', operation)
+                return reference
+
+        return message
+
+    def send(self, operation, message):
+        '''
+            Posts already rendered envelope and parses the reply with zeep.
+            Works for any operation - message can come from zeep or other process.
+        '''
+
+        client = self.api.client
+
+        response = client.transport.post(
+            client.service._binding_options['address'], message, self.http_headers(operation)
+        )
+
+        return self.binding.process_reply(client, self.binding.get(operation), response)
+
+    def call(self, operation, *args):
+        '''
+            Fast path call with zeep fallback.
+        '''
+
+        if not self.is_fast(operation):
+            return self.api.service_get(operation)(*args)
+
+        return self.send(operation, self.message(operation, *args))
+
+    def operation(self, operation):
+        '''
+            Callable bound to one operation - drop in for the service method.
+        '''
+
+        def fast_operation(*args):
+            return self.call(operation, *args)
+
+        fast_operation.__name__ = operation
+        return fast_operation
+
+
+def compile_plan(xsd_type, memo):
+    '''
+        Flattens zeep complex type into tuple plan:
+        (name, qname, accepts_multiple, children_plan or None, simple_type)
+    '''
+
+    key = id(xsd_type)
+
+    if key in memo:
+        return memo[key]
+
+    plan = memo[key] = []
+
+    for name, element in xsd_type.elements:
+        if isinstance(element.type, zeep.xsd.ComplexType):
+            plan.append((name, element.qname, element.accepts_multiple, compile_plan(element.type, memo), None))
+        else:
+            plan.append((name, element.qname, element.accepts_multiple, None, element.type))
+
+    return plan
+
+
+def render_plan(parent, plan, value):
+    '''
+        Renders dict / zeep object value on parent element following the plan.
+    '''
+
+    is_dict = isinstance(value, dict)
+
+    for name, qname, many, children, simple_type in plan:
+        item = value.get(name) if is_dict else getattr(value, name, None)
+
+        if item is None:
+            continue
+
+        for each in (item if many and isinstance(item, list) else (item,)):
+            if each is None:
+                continue
+
+            node = etree.SubElement(parent, qname)
+
+            if children is None:
+                node.text = simple_type.xmlvalue(each)
+            else:
+                render_plan(node, children, each)
@@ -0,0 +1,228 @@
+import collections
+import logging
+import queue
+import random
+import threading
+import time
+
+from zeep.helpers import serialize_object
+
+from .profiling import percentile
+
+
+logger = logging.getLogger(__name__)
+
+
+def shape(value):
+    '''
+        Structure of the response without values - {'Status': 'str', 'Packages': {...}}
+    '''
+
+    value = serialize_object(value, dict)
+
+    if isinstance(value, dict):
+        return dict((k, shape(v)) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return [shape(value[0])] if value else []
+
+    return type(value).__name__
+
+
+def shape_diff(prod, sandbox, path=''):
+    '''
+        Paths where shapes differ - None on either side is not a difference.
+    '''
+
+    if prod == sandbox or 'NoneType' in (prod, sandbox):
+        return []
+
+    if isinstance(prod, dict) and isinstance(sandbox, dict):
+        diff = []
+
+        for key in sorted(set(prod) | set(sandbox)):
+            if key not in prod or key not in sandbox:
+                diff.append('%s.%s' % (path, key))
+            else:
+                diff += shape_diff(prod[key], sandbox[key], '%s.%s' % (path, key))
+
+        return diff
+
+    if isinstance(prod, list) and isinstance(sandbox, list):
+        if not prod or not sandbox:
+            return []
+
+        return shape_diff(prod[0], sandbox[0], path + '[]')
+
+    return [path or '.']
+
+
+class DPDShadowMirror(object):
+    '''
+        Mirrors sample of production calls to the sandbox - in background threads, off the request path.
+
+        Production response goes back to the caller untouched. Sandbox gets the same arguments
+        (with sandbox auth) and shapes and latencies of both responses are compared.
+        When the queue is full mirrored calls are dropped, production never waits.
+
+        Use:
+            shadow = DPDShadowMirror(DPD_ApiInstance, sampleRate=0.05).attach()
+            ...
+            shadow.report()
+    '''
+
+    def __init__(self, api, sandboxApi=None, sampleRate=0.01, operations=None, workers=2, queueSize=1000, examples=20, windowSize=1000):
+        '''
+            api - production DPDAPI instance.
+            sandboxApi - DPDAPI(useTest=True) - created from api settings in background when None.
+            operations - operation names to mirror, None - all.
+            windowSize - latencies of last calls kept per operation for percentiles.
+        '''
+
+        self.api = api
+        self.sandboxApi = sandboxApi
+        self.sampleRate = sampleRate
+        self.operations = operations
+        self.examples = examples
+        self.windowSize = windowSize
+
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.lock = threading.Lock()
+        self.sandbox_lock = threading.Lock()
+        self.stats = {}
+        self.dropped = 0
+
+        self.workers = [threading.Thread(target=self.worker, daemon=True) for i in range(workers)]
+
+        for worker in self.workers:
+            worker.start()
+
+    def attach(self):
+        for operation in self.operations or [n for n in dir(self.api.service) if not n.startswith('__')]:
+            self.api.wrap_service_method(
+                operation,
+                lambda service_method, operation=operation: self.wrap(operation, service_method)
+            )
+
+        return self
+
+    def wrap(self, operation, service_method):
+        def mirrored_operation(*args):
+            start = time.perf_counter()
+
+            try:
+                response = service_method(*args)
+            except Exception as e:
+                self.sample(operation, args, e, time.perf_counter() - start)
+                raise
+
+            self.sample(operation, args, response, time.perf_counter() - start)
+            return response
+
+        mirrored_operation.__name__ = operation
+        return mirrored_operation
+
+    def sample(self, operation, args, response, latency):
+        if random.random() >= self.sampleRate:
+            return
+
+        try:
+            self.queue.put_nowait((operation, args, response, latency))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def get_sandbox_api(self):
+        with self.sandbox_lock:
+            if self.sandboxApi is None:
+                #same settings, sandbox credentials and WSDL
+                from .api import DPDAPI
+
+                sandboxApi = DPDAPI(useTest=True, initZeep=False, settings=None)
+
+                for attribute in ['SANDBOX_USERNAME', 'SANDBOX_PASSWORD', 'SANDBOX_FID', 'SANDBOX_API_WSDL']:
+                    setattr(sandboxApi, attribute, getattr(self.api, attribute))
+
+                sandboxApi.init_zeep()
+                self.sandboxApi = sandboxApi
+
+        return self.sandboxApi
+
+    def worker(self):
+        while True:
+            operation, args, response, latency = self.queue.get()
+
+            try:
+                self.mirror(operation, args, response, latency)
+            except Exception:
+                logger.exception('Shadow call of %s failed', operation)
+            finally:
+                self.queue.task_done()
+
+    def mirror(self, operation, args, prod_response, prod_latency):
+        sandbox = self.get_sandbox_api()
+
+        #objects from other client factory are not accepted - pass plain values, last arg is auth
+        sandbox_args = tuple(serialize_object(arg, dict) for arg in args[:-1]) + (sandbox.authPayload,)
+
+        start = time.perf_counter()
+
+        try:
+            #method attached to the instance - goes through fast serializer and other wrappers
+            sandbox_response = getattr(sandbox, operation)(*sandbox_args)
+        except Exception as e:
+            sandbox_response = e
+
+        sandbox_latency = time.perf_counter() - start
+
+        prod_error = isinstance(prod_response, Exception)
+        sandbox_error = isinstance(sandbox_response, Exception)
+
+        if prod_error or sandbox_error:
+            diff = [] if prod_error and sandbox_error else ['error: prod %r, sandbox %r' % (
+                prod_response if prod_error else None, sandbox_response if sandbox_error else None
+            )]
+        else:
+            diff = shape_diff(shape(prod_response), shape(sandbox_response))
+
+        with self.lock:
+            stats = self.stats.setdefault(operation, {
+                'count': 0,
+                'mismatches': 0,
+                'sandboxErrors': 0,
+                'prodLatency': collections.deque(maxlen=self.windowSize),
+                'sandboxLatency': collections.deque(maxlen=self.windowSize),
+                'examples': collections.deque(maxlen=self.examples),
+            })
+
+            stats['count'] += 1
+            stats['sandboxErrors'] += sandbox_error
+            stats['prodLatency'].append(prod_latency)
+            stats['sandboxLatency'].append(sandbox_latency)
+
+            if diff:
+                stats['mismatches'] += 1
+                stats['examples'].append(diff)
+
+    def wait(self):
+        '''
+            Blocks until queued shadow calls are done - for scripts and tests.
+        '''
+
+        self.queue.join()
+
+    def report(self):
+        with self.lock:
+            report = {'dropped': self.dropped, 'operations': {}}
+
+            for operation, stats in self.stats.items():
+                report['operations'][operation] = {
+                    'count': stats['count'],
+                    'mismatches': stats['mismatches'],
+                    'sandboxErrors': stats['sandboxErrors'],
+                    'prodLatency': dict(('p%d' % p, percentile(stats['prodLatency'], p)) for p in (50, 95, 99)),
+                    'sandboxLatency': dict(('p%d' % p, percentile(stats['sandboxLatency'], p)) for p in (50, 95, 99)),
+                    'examples': list(stats['examples']),
+                }
+
+        return report
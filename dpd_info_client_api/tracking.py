@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import threading
+import time
+
+from zeep.helpers import serialize_object
+
+
+class DPDTrackingStore(object):
+    '''
+        Local store of tracking events already seen per waybill.
+
+        Known waybills are polled with ONLY_LAST - full history is requested only
+        when the last event is new. New events are saved and passed to callbacks.
+
+        Use:
+            store = DPDTrackingStore(DPDInfoAPI(), 'tracking.sqlite3')
+            store.onChange(lambda waybill, events: print(waybill, events))
+            store.poll(['FOO', 'BAR'])
+    '''
+
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS dpd_waybills (
+            waybill TEXT PRIMARY KEY,
+            last_key TEXT,
+            checked_at REAL,
+            changed_at REAL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS dpd_events (
+            waybill TEXT NOT NULL,
+            event_key TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (waybill, event_key)
+        )''',
+    ]
+
+    def __init__(self, infoApi, path=':memory:', fullHistory=True, language='PL'):
+        '''
+            infoApi - DPDInfoAPI instance.
+            path - sqlite database file.
+            fullHistory - False stores only last events and never asks for ALL.
+        '''
+
+        self.infoApi = infoApi
+        self.fullHistory = fullHistory
+        self.language = language
+        self.callbacks = []
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+
+        with self.db:
+            for statement in self.SCHEMA:
+                self.db.execute(statement)
+
+    def onChange(self, callback):
+        '''
+            callback(waybill, new_events) - events are plain dicts, oldest first.
+        '''
+
+        self.callbacks.append(callback)
+
+    @staticmethod
+    def eventsFrom(response):
+        if response is None:
+            return []
+
+        events = getattr(response, 'eventsList', None)
+
+        if events is None and isinstance(response, (list, tuple)):
+            events = response
+
+        return [serialize_object(e, dict) for e in events or []]
+
+    @staticmethod
+    def eventKey(event):
+        '''
+            Event id when DPD sends it - otherwise code + time + depot.
+        '''
+
+        if event.get('eventId'):
+            return str(event['eventId'])
+
+        return '|'.join(str(event.get(k) or '') for k in ('businessCode', 'eventTime', 'depot', 'description'))
+
+    def lastKey(self, waybill):
+        row = self.db.execute('SELECT last_key FROM dpd_waybills WHERE waybill = ?', (waybill,)).fetchone()
+        return row and row[0]
+
+    def fetch(self, waybill, getAll):
+        return self.eventsFrom(
+            self.infoApi.getEventsForWaybill(waybill, getAll=getAll, language=self.language)
+        )
+
+    def pollWaybill(self, waybill):
+        '''
+            Returns list of new events for waybill (empty when nothing changed).
+        '''
+
+        known = self.lastKey(waybill)
+
+        if known is None and self.fullHistory:
+            events = self.fetch(waybill, getAll=True)
+        else:
+            events = self.fetch(waybill, getAll=False)
+
+            if events and self.eventKey(events[-1]) != known and self.fullHistory and known is not None:
+                events = self.fetch(waybill, getAll=True)
+
+        new_events = self.save(waybill, events)
+
+        if new_events:
+            for callback in self.callbacks:
+                callback(waybill, new_events)
+
+        return new_events
+
+    def poll(self, waybills):
+        '''
+            Polls all waybills, returns {waybill: new_events} for changed ones.
+        '''
+
+        changes = {}
+
+        for waybill in waybills:
+            new_events = self.pollWaybill(waybill)
+
+            if new_events:
+                changes[waybill] = new_events
+
+        return changes
+
+    def save(self, waybill, events):
+        now = time.time()
+        new_events = []
+
+        with self.lock, self.db:
+            seq = self.db.execute(
+                'SELECT COALESCE(MAX(seq), 0) FROM dpd_events WHERE waybill = ?', (waybill,)
+            ).fetchone()[0]
+
+            for event in events:
+                cursor = self.db.execute(
+                    'INSERT OR IGNORE INTO dpd_events (waybill, event_key, seq, data) VALUES (?, ?, ?, ?)',
+                    (waybill, self.eventKey(event), seq + 1, json.dumps(event, default=str))
+                )
+
+                if cursor.rowcount:
+                    seq += 1
+                    new_events.append(event)
+
+            last_key = self.eventKey(events[-1]) if events else self.lastKey(waybill)
+
+            self.db.execute(
+                '''INSERT INTO dpd_waybills (waybill, last_key, checked_at, changed_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(waybill) DO UPDATE SET
+                   last_key = excluded.last_key,
+                   checked_at = excluded.checked_at,
+                   changed_at = CASE WHEN ? THEN excluded.changed_at ELSE dpd_waybills.changed_at END''',
+                (waybill, last_key, now, now, bool(new_events))
+            )
+
+        return new_events
+
+    def events(self, waybill):
+        '''
+            Stored events for waybill, oldest first.
+        '''
+
+        return [
+            json.loads(row[0]) for row in self.db.execute(
+                'SELECT data FROM dpd_events WHERE waybill = ? ORDER BY seq', (waybill,)
+            )
+        ]
+
+    def waybills(self):
+        return [row[0] for row in self.db.execute('SELECT waybill FROM dpd_waybills ORDER BY waybill')]
+
+    def forget(self, waybill):
+        '''
+            Drop delivered waybill from the store.
+        '''
+
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM dpd_events WHERE waybill = ?', (waybill,))
+            self.db.execute('DELETE FROM dpd_waybills WHERE waybill = ?', (waybill,))
+
+    def close(self):
+        self.db.close()
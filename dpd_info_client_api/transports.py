@@ -0,0 +1,212 @@
+import gzip
+import json
+import re
+import threading
+import time
+import zlib
+
+import requests
+import zeep
+from requests.structures import CaseInsensitiveDict
+from zeep.exceptions import TransportError
+
+
+#operation name used for WSDL / XSD loads
+LOAD_OPERATION = '__load__'
+
+OPERATION_RE = re.compile(br'<(?:[\w.-]+:)?Body[^>]*>\s*<(?:[\w.-]+:)?([\w.-]+)')
+
+#authDataV1 fields - never written to record files
+REDACT_ELEMENTS = ('login', 'password', 'masterFid')
+
+REDACTED = b'REDACTED'
+
+
+def operation_name(message):
+    '''
+        First element in SOAP Body - that's the operation for document/literal.
+    '''
+
+    match = OPERATION_RE.search(message if isinstance(message, bytes) else message.encode('utf-8'))
+    return match.group(1).decode('utf-8') if match else None
+
+
+def redact(message, elements=REDACT_ELEMENTS):
+    '''
+        Message with text of given elements replaced - <password>REDACTED</password>.
+    '''
+
+    for element in elements:
+        message = re.sub(
+            br'(<(?:[\w.-]+:)?' + element.encode() + br'(?:\s[^>]*)?>)[^<]*(</(?:[\w.-]+:)?' + element.encode() + br'>)',
+            br'\1' + REDACTED + br'\2',
+            message
+        )
+
+    return message
+
+
+class DPDRecordFile(object):
+    '''
+        Append only file with recorded SOAP exchanges.
+
+        Every exchange is a separate gzip member: JSON header line + request + response bytes.
+        Side index file (path + '.idx') keeps operation, offset and length of every record,
+        so records of one operation can be read without decompressing the rest.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.lock = threading.Lock()
+
+    def write(self, operation, address, request, response, status, headers, latency):
+        header = json.dumps({
+            'operation': operation,
+            'address': address,
+            'status': status,
+            'headers': headers,
+            'latency': latency,
+            'time': time.time(),
+            'request': len(request),
+            'response': len(response),
+        }).encode('utf-8')
+
+        data = gzip.compress(header + b'\n' + request + response)
+
+        with self.lock:
+            with open(self.path, 'ab') as fh:
+                offset = fh.tell()
+                fh.write(data)
+
+            with open(self.index_path, 'a') as fh:
+                fh.write('%s\t%d\t%d\n' % (operation, offset, len(data)))
+
+    def index(self, operation=None):
+        '''
+            List of (operation, offset, length).
+        '''
+
+        with open(self.index_path) as fh:
+            entries = [line.rstrip('\n').split('\t') for line in fh if line.strip()]
+
+        return [
+            (op, int(offset), int(length)) for op, offset, length in entries
+            if operation is None or op == operation
+        ]
+
+    def operations(self):
+        return sorted(set(op for op, offset, length in self.index()))
+
+    def read(self, operation=None):
+        '''
+            Yields recorded exchanges as dicts - request and response are bytes.
+        '''
+
+        with open(self.path, 'rb') as fh:
+            for op, offset, length in self.index(operation):
+                fh.seek(offset)
+                data = zlib.decompress(fh.read(length), 16 + zlib.MAX_WBITS)
+
+                header, body = data.split(b'\n', 1)
+                record = json.loads(header.decode('utf-8'))
+
+                record['request'], record['response'] = body[:record['request']], body[record['request']:]
+
+                yield record
+
+
+class DPDRecordingTransport(zeep.Transport):
+    '''
+        Zeep transport that records every exchange (WSDL loads included) to DPDRecordFile.
+        Credentials (REDACT_ELEMENTS) are blanked in recorded requests - pass redactElements=() to keep them.
+        Use: DPDAPI(transport=DPDRecordingTransport('dpd.rec'))
+    '''
+
+    RECORD_HEADERS = ['Content-Type']
+
+    def __init__(self, path, *args, redactElements=REDACT_ELEMENTS, **kwargs):
+        super(DPDRecordingTransport, self).__init__(*args, **kwargs)
+        self.record_file = DPDRecordFile(path)
+        self.redactElements = redactElements
+
+    def _load_remote_data(self, url):
+        start = time.perf_counter()
+        content = super(DPDRecordingTransport, self)._load_remote_data(url)
+
+        self.record_file.write(
+            LOAD_OPERATION, url, b'', content, 200, {}, time.perf_counter() - start
+        )
+
+        return content
+
+    def post(self, address, message, headers):
+        start = time.perf_counter()
+        response = super(DPDRecordingTransport, self).post(address, message, headers)
+        latency = time.perf_counter() - start
+
+        message = message if isinstance(message, bytes) else message.encode('utf-8')
+
+        self.record_file.write(
+            operation_name(message), address, redact(message, self.redactElements), response.content, response.status_code,
+            dict((k, response.headers[k]) for k in self.RECORD_HEADERS if k in response.headers),
+            latency
+        )
+
+        return response
+
+
+class DPDReplayTransport(zeep.Transport):
+    '''
+        Serves recorded responses - no network at all.
+
+        Responses for an operation are served in recorded order and start over when exhausted.
+        latencyScale - 1.0 sleeps recorded latency, 0.5 half of it, 0 does not sleep.
+    '''
+
+    def __init__(self, path, latencyScale=1.0, *args, **kwargs):
+        super(DPDReplayTransport, self).__init__(*args, **kwargs)
+
+        self.latencyScale = latencyScale
+        self.lock = threading.Lock()
+        self.loads = {}
+        self.records = {}
+        self.positions = {}
+
+        for record in DPDRecordFile(path).read():
+            if record['operation'] == LOAD_OPERATION:
+                self.loads[record['address']] = record['response']
+            else:
+                self.records.setdefault(record['operation'], []).append(record)
+
+    def _load_remote_data(self, url):
+        if url not in self.loads:
+            raise TransportError('No recorded content for %s' % url)
+
+        return self.loads[url]
+
+    def next_record(self, operation):
+        records = self.records.get(operation)
+
+        if not records:
+            raise TransportError('No recorded responses for %s operation' % operation)
+
+        with self.lock:
+            position = self.positions.get(operation, 0)
+            self.positions[operation] = (position + 1) % len(records)
+
+        return records[position]
+
+    def post(self, address, message, headers):
+        record = self.next_record(operation_name(message))
+
+        if self.latencyScale:
+            time.sleep(record['latency'] * self.latencyScale)
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.headers = CaseInsensitiveDict(record['headers'])
+        response._content = record['response']
+        response.url = address
+
+        return response
@@ -1,4 +1,4 @@
-from setuptools import setup
+from setuptools import setup, find_packages
 
 setup(name='dpd_info_client_api',
       version='0.4',
@@ -23,10 +23,19 @@ setup(name='dpd_info_client_api',
       author_email='halgravity+githubrepo@gmail.com',
       license='MIT',
       zip_safe=True,
-      packages=['dpd_info_client_api'],
+      packages=find_packages(exclude=['tests', 'tests.*', 'benchmarks']),
       include_package_data=True,
       install_requires=[
           'zeep',
           'requests'
-      ]
+      ],
+      entry_points={
+          'console_scripts': [
+              'dpd=dpd_info_client_api.cli:main'
+          ]
+      },
+      extras_require={
+          'pdf': ['pypdf'],
+          'parquet': ['pyarrow']
+      }
       )
\ No newline at end of file
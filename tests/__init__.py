@@ -0,0 +1,57 @@
+import os
+
+from dpd_info_client_api.api import DPDAPI
+from dpd_info_client_api.settings import DPDSettingsObject
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+PACKAGE_WSDL = os.path.join(FIXTURES, 'DPDPackageObjServices.wsdl')
+
+SENDER_DATA = {
+    'address': 'Street Name 1',
+    'city': 'City Name',
+    'company': 'Hal Zero Coders',
+    'countryCode': 'PL',
+    'email': 'office@mymail.com',
+    'fid': '123123',
+    'phone': '500 100 100',
+    'postalCode': '00-999'
+}
+
+RECIPIENT_DATA = {
+    'address': 'Other Street 2',
+    'city': 'Other City',
+    'countryCode': 'PL',
+    'name': 'Jan Kowalski',
+    'phone': '500 200 200',
+    'postalCode': '11-111'
+}
+
+
+def fixture_settings():
+    settings = DPDSettingsObject()
+    settings.DPD_API_USERNAME = 'login'
+    settings.DPD_API_PASSWORD = 'secret'
+    settings.DPD_API_FID = '1495'
+    settings.DPD_API_SANDBOX_USERNAME = 'sandbox-login'
+    settings.DPD_API_SANDBOX_PASSWORD = 'sandbox-secret'
+    settings.DPD_API_SANDBOX_FID = '1000'
+    return settings
+
+
+def fixture_api(transport=None, address=None, wsdl=PACKAGE_WSDL):
+    '''
+        DPDAPI on the fixture WSDL - address overrides the service location.
+        With stub server pass wsdl=stub.wsdl_url.
+    '''
+
+    api = DPDAPI(initZeep=False, settings=fixture_settings(), transport=transport)
+    api.PROD_API_WSDL = wsdl
+    api.init_zeep()
+
+    if address:
+        api.client.service._binding_options['address'] = address
+
+    api.setPickupAddress(SENDER_DATA)
+    return api
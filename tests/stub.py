@@ -0,0 +1,104 @@
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dpd_info_client_api.transports import operation_name
+
+from . import FIXTURES, PACKAGE_WSDL
+
+
+RESPONSES = os.path.join(FIXTURES, 'responses')
+
+
+class DPDStubServer(object):
+    '''
+        Local DPD stand in - serves the fixture WSDL and canned responses per operation.
+
+        WSDL is at stub.wsdl_url with soap:address pointing back at the stub.
+        Every posted envelope is kept in stub.requests as (operation, bytes), WSDL loads in stub.loads.
+
+        Use:
+            with DPDStubServer() as stub:
+                api = fixture_api(address=stub.address)
+    '''
+
+    def __init__(self, port=0, wsdl=PACKAGE_WSDL, responses=RESPONSES, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.loads = []
+        self.lock = threading.Lock()
+
+        with open(wsdl, 'rb') as fh:
+            self.wsdl = fh.read()
+
+        self.responses = {}
+
+        for name in os.listdir(responses):
+            if name.endswith('.xml'):
+                with open(os.path.join(responses, name), 'rb') as fh:
+                    self.responses[name[:-len('.xml')]] = fh.read()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.loads.append(self.path)
+
+                self.reply(200, stub.wsdl)
+
+            def do_POST(self):
+                message = self.rfile.read(int(self.headers['Content-Length']))
+                operation = operation_name(message)
+
+                with stub.lock:
+                    stub.requests.append((operation, message))
+
+                stub.delay and time.sleep(stub.delay)
+
+                if operation not in stub.responses:
+                    return self.reply(500, b'no canned response for %s' % (operation or '?').encode())
+
+                self.reply(200, stub.responses[operation])
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 1024
+
+        self.server = Server(('127.0.0.1', port), Handler)
+        self.address = 'http://127.0.0.1:%d/DPDPackageObjServices' % self.server.server_port
+        self.wsdl_url = self.address + '?WSDL'
+
+        #soap:address of the fixture points at the stub
+        self.wsdl = re.sub(br'location="[^"]+"', b'location="' + self.address.encode() + b'"', self.wsdl)
+
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,135 @@
+import types
+import unittest
+
+from dpd_info_client_api.codegen import DPDBuilder, generate, verify
+from dpd_info_client_api.serializer import DPDFastSerializer
+
+from . import PACKAGE_WSDL, fixture_api
+
+
+def load_builders(source):
+    module = types.ModuleType('dpd_builders')
+    exec(compile(source, 'dpd_builders.py', 'exec'), module.__dict__)
+    return module
+
+
+class GeneratedBuildersTest(unittest.TestCase):
+    '''
+        Builders generated from the fixture WSDL render the same envelopes as zeep.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = fixture_api()
+        cls.serializer = DPDFastSerializer(
+            cls.api, operations=('generatePackagesNumbersV4', 'generateSpedLabelsV4', 'findPostalCodeV1')
+        )
+        cls.B = load_builders(generate(PACKAGE_WSDL))
+
+    def auth(self):
+        return self.B.authDataV1(login='login', masterFid=1495, password='secret & <more>')
+
+    def assertSameEnvelope(self, operation, *args):
+        zeep_args = [arg.to_dict() if isinstance(arg, DPDBuilder) else arg for arg in args]
+
+        self.assertEqual(
+            self.serializer.render(operation, *args),
+            self.serializer.render_zeep(operation, *zeep_args)
+        )
+
+    def test_verify(self):
+        self.assertEqual(verify(self.B, self.api.client), [])
+
+    def test_verify_finds_changes(self):
+        B = load_builders(generate(PACKAGE_WSDL).replace("'sizeX', 'sizeY', ", "'sizeX', "))
+        del B.postalCodeV1
+
+        problems = verify(B, self.api.client)
+
+        self.assertIn('postalCodeV1: no builder', problems)
+        self.assertTrue(any(p.startswith('parcelOpenUMLFeV1: elements') for p in problems))
+
+    def test_all_request_types(self):
+        for name in ['openUMLFeV3', 'packageOpenUMLFeV3', 'servicesOpenUMLFeV4', 'dpdServicesParamsV1', 'senderPlaceV1']:
+            self.assertTrue(issubclass(getattr(self.B, name), DPDBuilder), name)
+
+        self.assertEqual(
+            self.B.OPERATIONS['findPostalCodeV1'], (('postalCodeV1', 'postalCodeV1'), ('authDataV1', 'authDataV1'))
+        )
+
+    def test_slots(self):
+        address = self.B.packageAddressOpenUMLFeV1(city='City Name')
+
+        with self.assertRaises(AttributeError):
+            address.cty = 'typo'
+
+        with self.assertRaises(TypeError):
+            self.B.packageAddressOpenUMLFeV1(cty='typo')
+
+    def test_shipment(self):
+        B = self.B
+
+        packages = B.openUMLFeV3(packages=[B.packageOpenUMLFeV3(
+            parcels=[B.parcelOpenUMLFeV1(weight=2.5, sizeX=10, content='Fish & <Chips>'), B.parcelOpenUMLFeV1(weight=1)],
+            payerType='SENDER',
+            receiver=B.packageAddressOpenUMLFeV1(city='Other City', postalCode='11111', countryCode='PL', name='Jan'),
+            sender=B.packageAddressOpenUMLFeV1(city='City Name', postalCode='00999', fid=1495),
+            ref1='order 1',
+            services=B.servicesOpenUMLFeV4(
+                cod=B.serviceCODOpenUMLFeV1(amount='12.99', currency='PLN'),
+                duty=B.serviceDutyOpenUMLeFV2(amount='50', currency='EUR'),
+                pallet=B.servicePalletOpenUMLFeV1(),
+                selfCol=B.serviceSelfColOpenUMLFeV1(receiver='PRIV'),
+            ),
+        )])
+
+        self.assertSameEnvelope('generatePackagesNumbersV4', packages, 'IGNORE_ERRORS', 'PL', self.auth())
+
+    def test_none_in_repeated_elements(self):
+        B = self.B
+
+        packages = B.openUMLFeV3(packages=[None, B.packageOpenUMLFeV3(parcels=[None, B.parcelOpenUMLFeV1(weight=1)])])
+
+        self.assertSameEnvelope('generatePackagesNumbersV4', packages, 'STOP_ON_FIRST_ERROR', 'PL', self.auth())
+
+    def test_label(self):
+        B = self.B
+
+        params = B.dpdServicesParamsV1(
+            policy='STOP_ON_FIRST_ERROR',
+            pickupAddress=B.packageAddressOpenUMLFeV1(city='City Name', fid=1495),
+            session=B.sessionDSPV1(
+                sessionType='DOMESTIC',
+                packages=[B.packageDSPV1(parcels=[B.parcelDSPV1(waybill='0000000000001A'), B.parcelDSPV1(waybill='0000000000002A')])],
+            ),
+        )
+
+        self.assertSameEnvelope('generateSpedLabelsV4', params, 'ZPL', 'LBL_PRINTER', 'BIC3', None, self.auth())
+
+    def test_postal_code(self):
+        self.assertSameEnvelope('findPostalCodeV1', self.B.postalCodeV1(countryCode='PL', zipCode='00999'), self.auth())
+
+    def test_to_dict_and_equality(self):
+        parcel = self.B.parcelOpenUMLFeV1(weight=1, content='x')
+
+        self.assertEqual(parcel.to_dict(), {'content': 'x', 'weight': 1})
+        self.assertEqual(parcel, self.B.parcelOpenUMLFeV1(weight=1, content='x'))
+        self.assertNotEqual(parcel, self.B.parcelOpenUMLFeV1(weight=2, content='x'))
+
+    def test_keyword_elements(self):
+        class keywordType(DPDBuilder):
+            __slots__ = ('return_', 'value')
+            _elements = {'return_': 'return'}
+
+            def __init__(self, return_=None, value=None):
+                self.return_ = return_
+                self.value = value
+
+        item = keywordType(return_='yes')
+
+        self.assertEqual(getattr(item, 'return'), 'yes')
+        self.assertEqual(item.to_dict(), {'return': 'yes'})
+
+
+if __name__ == '__main__':
+    unittest.main()
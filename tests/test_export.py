@@ -0,0 +1,112 @@
+import csv
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from dpd_info_client_api import cli
+from dpd_info_client_api.export import DPDEventExporter, readNDJSON
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def event(n, depot='Warszawa'):
+    return {'eventId': n, 'waybill': '0000000000001A', 'businessCode': '190101', 'depot': depot, 'description': 'Doręczono'}
+
+
+class FakeInfoAPI(object):
+    '''
+        Customer event feed - one page per call, confirmed ids are kept.
+    '''
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.confirmed = []
+
+    def getEventsForCustomer(self, limit):
+        events, confirmId = self.pages.pop(0) if self.pages else ([], None)
+        return types.SimpleNamespace(eventsList=events, confirmId=confirmId)
+
+    def confirmEventRecieved(self, confirmId):
+        self.confirmed.append(confirmId)
+
+
+class EventExporterTest(unittest.TestCase):
+    '''
+        Second export to the same path adds to the first one.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self, path, format, events):
+        with DPDEventExporter(path, format) as exporter:
+            exporter.extend(events)
+
+        return exporter
+
+    def test_ndjson_appends(self):
+        path = os.path.join(self.directory, 'events.ndjson')
+
+        self.export(path, 'ndjson', [event(1), event(2, 'Kraków')])
+        self.export(path, 'ndjson', [event(3, 'Kraków'), event(4)])
+
+        self.assertEqual(
+            [(row['eventId'], row['depot']) for row in readNDJSON(path)],
+            [(1, 'Warszawa'), (2, 'Kraków'), (3, 'Kraków'), (4, 'Warszawa')]
+        )
+
+    def test_csv_appends(self):
+        path = os.path.join(self.directory, 'events.csv')
+
+        self.export(path, 'csv', [event(1), event(2, 'Kraków')])
+        self.export(path, 'csv', [event(3, 'Gdańsk'), event(4, 'Kraków')])
+
+        with open(path, newline='') as fh:
+            rows = list(csv.DictReader(fh))
+
+        with open(path + '.dict.csv', newline='') as fh:
+            codes = dict(((row['field'], row['code']), row['value']) for row in csv.DictReader(fh))
+
+        #one header, codes continue from the first export
+        self.assertEqual([row['eventId'] for row in rows], ['1', '2', '3', '4'])
+        self.assertEqual([codes['depot', row['depot']] for row in rows], ['Warszawa', 'Kraków', 'Gdańsk', 'Kraków'])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_never_overwrites(self):
+        path = os.path.join(self.directory, 'events.parquet')
+        self.export(path, 'parquet', [event(1)])
+
+        with self.assertRaises(FileExistsError):
+            DPDEventExporter(path, 'parquet')
+
+        parts = os.path.join(self.directory, 'parts')
+        os.mkdir(parts)
+
+        self.export(parts, 'parquet', [event(1)])
+        self.export(parts, 'parquet', [event(2)])
+
+        self.assertEqual(sorted(pyarrow.parquet.read_table(parts).column('eventId').to_pylist()), [1, 2])
+
+    def test_events_drain_twice(self):
+        path = os.path.join(self.directory, 'events.ndjson')
+        infoApi = FakeInfoAPI([([event(1)], 'c1'), ([event(2)], 'c2')])
+
+        with mock.patch.object(cli, 'get_info_api', return_value=infoApi):
+            cli.main(['events-drain', path, '--format', 'ndjson', '--limit', '10'])
+            cli.main(['events-drain', path, '--format', 'ndjson', '--limit', '10'])
+
+        self.assertEqual(infoApi.confirmed, ['c1', 'c2'])
+        self.assertEqual([row['eventId'] for row in readNDJSON(path)], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dpd_info_client_api.labels import DPDFileSpool, DPDLabelSpooler
+
+
+class LabelSpoolerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = DPDFileSpool(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_jobs(self):
+        with DPDLabelSpooler(self.spool, 'ZPL', labelsPerJob=2) as spooler:
+            spooler.extend([b'^XA1^XZ', b'^XA2^XZ\n', b'^XA3^XZ'])
+
+        self.assertEqual(spooler.labels, 3)
+        self.assertEqual([os.path.basename(path) for path in spooler.jobs], ['labels-00001.zpl', 'labels-00002.zpl'])
+
+        with open(spooler.jobs[0], 'rb') as fh:
+            self.assertEqual(fh.read(), b'^XA1^XZ\n^XA2^XZ\n')
+
+    def test_failed_block_discards_unfinished_job(self):
+        with self.assertRaises(RuntimeError):
+            with DPDLabelSpooler(self.spool, 'ZPL', labelsPerJob=2) as spooler:
+                spooler.extend([b'^XA1^XZ', b'^XA2^XZ', b'^XA3^XZ'])
+                job_path = spooler.job_path
+                raise RuntimeError('label call failed')
+
+        #full job went out, half filled one did not
+        self.assertEqual(spooler.jobs, self.spool.paths)
+        self.assertEqual(len(spooler.jobs), 1)
+        self.assertEqual(spooler.labels, 2)
+        self.assertFalse(os.path.exists(job_path))
+        self.assertIsNone(spooler.job_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import threading
+import unittest
+
+from zeep.exceptions import TransportError
+
+from dpd_info_client_api.pickup import DPDPickupScheduler
+from dpd_info_client_api.serializer import DPDFastSerializer
+
+from . import SENDER_DATA, fixture_api
+from .stub import DPDStubServer
+
+
+OTHER_WAREHOUSE = {
+    'address': 'Warehouse Street 5',
+    'city': 'Other City',
+    'company': 'Hal Zero Coders',
+    'countryCode': 'PL',
+    'name': 'Second Warehouse',
+    'phone': '500 300 300',
+    'postalCode': '11-111'
+}
+
+
+class PickupCallTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = fixture_api()
+        cls.serializer = DPDFastSerializer(cls.api, operations=())
+
+    def envelope(self, *args, **kwargs):
+        return self.serializer.render_zeep(
+            'packagesPickupCallV4', *self.api.pickupCall(*args, returnPayload=True, **kwargs)
+        )
+
+    def test_payload(self):
+        envelope = self.envelope(
+            ['0000000000001A', '0000000000002A'], '2026-10-20', '10:00', '16:00', parcelsWeight=12, parcelMaxWeight=8
+        )
+
+        self.assertIn(b'<operationType>INSERT</operationType><orderType>DOMESTIC</orderType>', envelope)
+        self.assertIn(b'<parcelMaxWeight>8</parcelMaxWeight><parcelsCount>2</parcelsCount><parcelsWeight>12</parcelsWeight>', envelope)
+        self.assertIn(b'<payerName>Hal Zero Coders</payerName><payerNumber>1495</payerNumber>', envelope)
+        self.assertIn(b'<senderCity>City Name</senderCity>', envelope)
+        self.assertIn(b'<senderPostalCode>00999</senderPostalCode>', envelope)
+        self.assertIn(b'<pickupDate>2026-10-20</pickupDate><pickupTimeFrom>10:00</pickupTimeFrom><pickupTimeTo>16:00</pickupTimeTo>', envelope)
+        self.assertIn(b'<waybillsReady>true</waybillsReady>', envelope)
+
+    def test_sender_data_and_options(self):
+        envelope = self.envelope(
+            ['0000000000001A'], '2026-10-20', '10:00', '16:00',
+            senderData=OTHER_WAREHOUSE, orderType='INTERNATIONAL', operationType='CANCEL',
+            orderNumber='PICKUP/1', checkSum=1234, payerNumber=42
+        )
+
+        self.assertIn(b'<checkSum>1234</checkSum><operationType>CANCEL</operationType>', envelope)
+        self.assertIn(b'<orderNumber>PICKUP/1</orderNumber><orderType>INTERNATIONAL</orderType>', envelope)
+        self.assertIn(b'<senderPostalCode>11111</senderPostalCode>', envelope)
+        self.assertIn(b'<customerName>Second Warehouse</customerName>', envelope)
+        self.assertIn(b'<payerNumber>42</payerNumber>', envelope)
+
+    def test_validation(self):
+        with self.assertRaises(AttributeError):
+            self.api.pickupCall([], '2026-10-20', '10:00', '16:00')
+
+        with self.assertRaises(ValueError):
+            self.api.pickupCall(['0000000000001A'], '2026-10-20', '10:00', '16:00', orderType='LOCAL')
+
+        with self.assertRaises(ValueError):
+            self.api.pickupCall(['0000000000001A'], '2026-10-20', '10:00', '16:00', operationType='DELETE')
+
+
+class PickupSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = DPDStubServer().start()
+        self.api = fixture_api(wsdl=self.stub.wsdl_url)
+        self.scheduler = DPDPickupScheduler(self.api)
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def pickups(self):
+        return [message for operation, message in self.stub.requests if operation == 'packagesPickupCallV4']
+
+    def test_flush_groups(self):
+        self.scheduler.add('0000000000001A', weight=2, pickupDate='2026-10-20')
+        self.scheduler.add('0000000000002A', senderData=OTHER_WAREHOUSE, pickupDate='2026-10-20')
+        self.scheduler.add('0000000000003A', weight=5, pickupDate='2026-10-20')
+        self.scheduler.add('0000000000004A', pickupDate='2026-10-20', pickupTimeFrom='08:00', pickupTimeTo='12:00')
+
+        results = self.scheduler.flush()
+
+        self.assertEqual(
+            [waybills for waybills, response in results],
+            [['0000000000001A', '0000000000003A'], ['0000000000002A'], ['0000000000004A']]
+        )
+        self.assertEqual(results[0][1].orderNumber, 'PICKUP/1')
+        self.assertEqual(self.scheduler.pending(), [])
+
+        first, second, third = self.pickups()
+
+        self.assertIn(b'<parcelMaxWeight>5</parcelMaxWeight><parcelsCount>2</parcelsCount><parcelsWeight>7</parcelsWeight>', first)
+        self.assertIn(b'<senderCity>City Name</senderCity>', first)
+        self.assertIn(b'<senderCity>Other City</senderCity>', second)
+        self.assertIn(b'<pickupTimeFrom>08:00</pickupTimeFrom><pickupTimeTo>12:00</pickupTimeTo>', third)
+
+    def test_requeue_after_error(self):
+        pickupCall = self.api.pickupCall
+
+        def failing_pickup_call(waybills, *args, **kwargs):
+            if '0000000000002A' in waybills:
+                raise TransportError('DPD is down')
+
+            return pickupCall(waybills, *args, **kwargs)
+
+        self.api.pickupCall = failing_pickup_call
+
+        self.scheduler.add('0000000000001A', pickupDate='2026-10-20')
+        self.scheduler.add('0000000000002A', senderData=OTHER_WAREHOUSE, pickupDate='2026-10-20')
+        self.scheduler.add('0000000000003A', pickupDate='2026-10-20', pickupTimeFrom='08:00')
+
+        with self.assertRaises(TransportError):
+            self.scheduler.flush()
+
+        #ordered group is gone, failed one and the rest wait for next flush
+        self.assertEqual(
+            [waybills for senderData, pickupDate, timeFrom, timeTo, waybills in self.scheduler.pending()],
+            [['0000000000002A'], ['0000000000003A']]
+        )
+
+        self.scheduler.add('0000000000005A', senderData=OTHER_WAREHOUSE, pickupDate='2026-10-20')
+        self.api.pickupCall = pickupCall
+
+        self.assertEqual(
+            [waybills for waybills, response in self.scheduler.flush()],
+            [['0000000000002A', '0000000000005A'], ['0000000000003A']]
+        )
+        self.assertEqual(len(self.pickups()), 3)
+
+    def test_sender_is_resolved_on_add(self):
+        def warehouse_thread():
+            with self.api.context(senderData=OTHER_WAREHOUSE):
+                self.scheduler.add('0000000000002A', pickupDate='2026-10-20')
+
+        self.scheduler.add('0000000000001A', pickupDate='2026-10-20')
+
+        thread = threading.Thread(target=warehouse_thread)
+        thread.start()
+        thread.join()
+
+        results = self.scheduler.flush()
+
+        self.assertEqual([waybills for waybills, response in results], [['0000000000001A'], ['0000000000002A']])
+
+        first, second = self.pickups()
+        self.assertIn(b'<senderCity>City Name</senderCity>', first)
+        self.assertIn(b'<senderCity>Other City</senderCity>', second)
+
+    def test_same_sender_explicit_or_default(self):
+        self.scheduler.add('0000000000001A', pickupDate='2026-10-20')
+        self.scheduler.add('0000000000002A', senderData=SENDER_DATA, pickupDate='2026-10-20')
+
+        self.assertEqual(len(self.scheduler.pending()), 1)
+
+    def test_no_sender(self):
+        api = fixture_api(wsdl=self.stub.wsdl_url)
+        api.pickup_address = None
+
+        with self.assertRaises(UnboundLocalError):
+            DPDPickupScheduler(api).add('0000000000001A')
+
+    def test_courier_availability_cached(self):
+        first = self.scheduler.courierAvailability('11-111')
+
+        self.assertIs(self.scheduler.courierAvailability('11111'), first)
+        self.assertEqual([r.range for r in first.ranges], ['09:00-12:00', '12:00-15:00'])
+        self.assertEqual(len([op for op, message in self.stub.requests if op == 'getCourierOrderAvailabilityV1']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
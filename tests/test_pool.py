@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import zeep
+from zeep.cache import SqliteCache
+
+from dpd_info_client_api.pool import DPDPayloadError, DPDPayloadPool
+from dpd_info_client_api.serializer import DPDFastSerializer
+
+from . import RECIPIENT_DATA, fixture_api
+from .stub import DPDStubServer
+
+
+SHIPMENT = {'packageData': {'weight': 2.5, 'content': 'Books'}, 'recieverData': RECIPIENT_DATA, 'servicesData': {'cod': 10}}
+
+
+class PayloadPoolTest(unittest.TestCase):
+    '''
+        Pooled envelopes are what the parent would send.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.stub = DPDStubServer().start()
+
+    def tearDown(self):
+        self.stub.stop()
+        shutil.rmtree(self.directory)
+
+    def test_context_sender_and_policy(self):
+        api = fixture_api(wsdl=self.stub.wsdl_url)
+        api.setGenerationPolicy(3)
+        serializer = DPDFastSerializer(api, operations=())
+
+        with api.context(senderData={'city': 'Warehouse 2', 'fid': '1495'}, generationPolicy=2):
+            expected = serializer.render_zeep(
+                'generatePackagesNumbersV4', *api.GenerateSingleParcelShipment(returnPayload=True, **SHIPMENT)
+            )
+
+            with DPDPayloadPool(api, processes=1) as pool:
+                messages = list(pool.buildMessages([SHIPMENT]))
+
+        self.assertEqual(messages, [expected])
+        self.assertIn(api.GP_VALUES[2].encode(), expected)
+        self.assertIn(b'Warehouse 2', expected)
+
+    def test_generate_shipments(self):
+        api = fixture_api(wsdl=self.stub.wsdl_url)
+        invalid = dict(SHIPMENT, recieverData={'unknownField': 1})
+
+        with DPDPayloadPool(api, processes=2, chunksize=1) as pool:
+            responses = list(pool.generateShipments([SHIPMENT, invalid, SHIPMENT]))
+
+        self.assertEqual(responses[0].Status, 'OK')
+        self.assertIsInstance(responses[1], DPDPayloadError)
+        self.assertEqual(responses[2].Status, 'OK')
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_workers_share_sqlite_cache(self):
+        cache = SqliteCache(path=os.path.join(self.directory, 'wsdl.db'))
+        api = fixture_api(transport=zeep.Transport(cache=cache), wsdl=self.stub.wsdl_url)
+
+        self.assertEqual(len(self.stub.loads), 1)
+
+        with DPDPayloadPool(api, processes=2) as pool:
+            self.assertEqual(len(list(pool.buildMessages([SHIPMENT] * 4))), 4)
+
+        self.assertEqual(len(self.stub.loads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
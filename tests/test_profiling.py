@@ -0,0 +1,40 @@
+import io
+import unittest
+
+from dpd_info_client_api.profiling import DPDProfiler
+
+from . import fixture_api
+from .stub import DPDStubServer
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_report_and_stats(self):
+        with DPDStubServer() as stub:
+            api = fixture_api(wsdl=stub.wsdl_url)
+
+            with api.profile(cprofileRate=1.0, traceMalloc=True) as profiler:
+                for i in range(3):
+                    api.findPostalCode('00-999')
+
+        stats = profiler.report()['operations']['findPostalCodeV1']
+
+        self.assertEqual(stats['count'], 3)
+        self.assertGreater(stats['network']['sum'], 0)
+        #peak within the call, not net retained memory
+        self.assertGreater(stats['memory']['max'], 0)
+        self.assertLessEqual(stats['memory']['p95'], stats['memory']['max'])
+
+        stream = io.StringIO()
+        self.assertTrue(profiler.printStats(5, stream=stream))
+        self.assertIn('function calls', stream.getvalue())
+
+    def test_no_samples(self):
+        stream = io.StringIO()
+
+        self.assertFalse(DPDProfiler().printStats(stream=stream))
+        self.assertEqual(stream.getvalue(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,267 @@
+import threading
+import time
+import unittest
+
+from zeep.exceptions import Fault, TransportError
+
+from dpd_info_client_api.resilience import DPDCircuitBreaker, DPDCircuitOpenError
+
+
+class FakeOperation(object):
+    '''
+        Service method stand in - answers from a list, exceptions are raised.
+    '''
+
+    def __init__(self, *answers, delay=0.0):
+        self.answers = list(answers)
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.calls += 1
+            answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+
+        self.delay and time.sleep(self.delay)
+
+        if isinstance(answer, Exception):
+            raise answer
+
+        return answer
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def call(self, breaker, operation, *args, hedge=False):
+        return breaker.call('findPostalCodeV1', operation, args + ('auth',), hedge)
+
+    def open_circuit(self, breaker):
+        failing = FakeOperation(TransportError('down'))
+
+        for i in range(breaker.failureThreshold):
+            with self.assertRaises(TransportError):
+                self.call(breaker, failing, 'other')
+
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'OPEN')
+
+    def test_opens_after_threshold(self):
+        breaker = DPDCircuitBreaker(failureThreshold=3, resetTimeout=60)
+        failing = FakeOperation(TransportError('down'))
+
+        for i in range(2):
+            with self.assertRaises(TransportError):
+                self.call(breaker, failing, 'a')
+
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'CLOSED')
+
+        with self.assertRaises(TransportError):
+            self.call(breaker, failing, 'a')
+
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'OPEN')
+
+        #fails fast - DPD is not called
+        with self.assertRaises(DPDCircuitOpenError):
+            self.call(breaker, failing, 'a')
+
+        self.assertEqual(failing.calls, 3)
+
+    def test_success_resets_failures(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2)
+
+        with self.assertRaises(TransportError):
+            self.call(breaker, FakeOperation(TransportError('down')), 'a')
+
+        self.call(breaker, FakeOperation('OK'), 'a')
+
+        with self.assertRaises(TransportError):
+            self.call(breaker, FakeOperation(TransportError('down')), 'a')
+
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'CLOSED')
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, latencyThreshold=0.01)
+        slow = FakeOperation('OK', delay=0.03)
+
+        self.assertEqual(self.call(breaker, slow, 'a'), 'OK')
+        self.assertEqual(self.call(breaker, slow, 'a'), 'OK')
+
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'OPEN')
+
+    def test_serves_cached_while_open(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, resetTimeout=60)
+
+        self.assertEqual(self.call(breaker, FakeOperation('cached'), 'a'), 'cached')
+        self.open_circuit(breaker)
+
+        self.assertEqual(self.call(breaker, FakeOperation('fresh'), 'a'), 'cached')
+
+        with self.assertRaises(DPDCircuitOpenError):
+            self.call(breaker, FakeOperation('fresh'), 'b')
+
+    def test_cache_off(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, resetTimeout=60, serveCached=False)
+
+        self.call(breaker, FakeOperation('cached'), 'a')
+        self.open_circuit(breaker)
+
+        with self.assertRaises(DPDCircuitOpenError):
+            self.call(breaker, FakeOperation('fresh'), 'a')
+
+    def test_single_half_open_probe(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, resetTimeout=0, serveCached=False)
+        self.open_circuit(breaker)
+
+        other = []
+
+        def probe(*args):
+            #second call while the probe is in flight is not let through
+            try:
+                self.call(breaker, FakeOperation('other'), 'a')
+            except DPDCircuitOpenError as e:
+                other.append(e)
+
+            return 'probe'
+
+        self.assertEqual(self.call(breaker, probe, 'a'), 'probe')
+        self.assertEqual(len(other), 1)
+        self.assertEqual(breaker.state('findPostalCodeV1'), 'CLOSED')
+
+    def test_failed_probe_reopens(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, resetTimeout=0)
+        self.open_circuit(breaker)
+
+        with self.assertRaises(TransportError):
+            self.call(breaker, FakeOperation(TransportError('still down')), 'a')
+
+        circuit = breaker.circuit('findPostalCodeV1')
+        self.assertEqual(circuit.state, 'OPEN')
+        self.assertFalse(circuit.probing)
+
+    def test_fault_releases_probe_without_caching(self):
+        breaker = DPDCircuitBreaker(failureThreshold=2, resetTimeout=0)
+        self.open_circuit(breaker)
+
+        with self.assertRaises(Fault):
+            self.call(breaker, FakeOperation(Fault('Invalid zip code')), 'a')
+
+        circuit = breaker.circuit('findPostalCodeV1')
+        self.assertEqual(circuit.state, 'CLOSED')
+        self.assertFalse(circuit.probing)
+        self.assertEqual(circuit.failures, 0)
+        self.assertEqual(list(circuit.cache), [])
+        self.assertEqual(list(circuit.latencies), [])
+
+
+class HedgedCallTest(unittest.TestCase):
+
+    def call(self, breaker, operation, *args):
+        return breaker.call('findPostalCodeV1', operation, args + ('auth',), True)
+
+    def test_fast_first_attempt_is_not_hedged(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=0.05)
+        operation = FakeOperation('first')
+
+        self.assertEqual(self.call(breaker, operation, 'a'), 'first')
+        time.sleep(0.1)
+
+        self.assertEqual(operation.calls, 1)
+
+    def test_hedge_wins_when_first_attempt_fails(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=0.02)
+        first = threading.Event()
+
+        def operation(*args):
+            if not first.is_set():
+                first.set()
+                time.sleep(0.2)
+                raise TransportError('timeout')
+
+            return 'hedge'
+
+        self.assertEqual(self.call(breaker, operation, 'a'), 'hedge')
+
+        #winner's own latency, not time since the call started
+        circuit = breaker.circuit('findPostalCodeV1')
+        self.assertEqual(circuit.failures, 0)
+        self.assertLess(circuit.latencies[-1], 0.1)
+
+    def test_hedge_loses(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=0.01)
+        first = threading.Event()
+
+        def operation(*args):
+            if not first.is_set():
+                first.set()
+                time.sleep(0.05)
+                return 'first'
+
+            raise TransportError('hedge failed')
+
+        self.assertEqual(self.call(breaker, operation, 'a'), 'first')
+        self.assertEqual(breaker.circuit('findPostalCodeV1').failures, 0)
+
+    def test_both_attempts_fail(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=0.01)
+        operation = FakeOperation(TransportError('first'), TransportError('hedge'), delay=0.05)
+
+        with self.assertRaises(TransportError) as raised:
+            self.call(breaker, operation, 'a')
+
+        self.assertEqual(str(raised.exception), 'first')
+        self.assertEqual(operation.calls, 2)
+        self.assertEqual(breaker.circuit('findPostalCodeV1').failures, 1)
+
+    def test_no_free_worker_skips_hedge(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=0.01, hedgeWorkers=1)
+        operation = FakeOperation(TransportError('first'), 'hedge', delay=0.05)
+
+        self.call(breaker, FakeOperation('warm up'), 'a')
+        breaker.hedge_slots.acquire()
+
+        try:
+            with self.assertRaises(TransportError):
+                self.call(breaker, operation, 'a')
+        finally:
+            breaker.hedge_slots.release()
+
+        self.assertEqual(operation.calls, 1)
+
+    def test_concurrency_is_not_capped_by_hedge_workers(self):
+        breaker = DPDCircuitBreaker(hedgeDelay=10, hedgeWorkers=2)
+        callers = 16
+        in_flight = [0, 0]
+        lock = threading.Lock()
+
+        def operation(*args):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+
+            time.sleep(0.1)
+
+            with lock:
+                in_flight[0] -= 1
+
+            return 'OK'
+
+        barrier = threading.Barrier(callers)
+
+        def caller():
+            barrier.wait()
+            self.call(breaker, operation, 'a')
+
+        threads = [threading.Thread(target=caller) for i in range(callers)]
+        start = time.monotonic()
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(in_flight[1], callers)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+
+from dpd_info_client_api.serializer import DPDFastSerializer
+
+from . import RECIPIENT_DATA, SENDER_DATA, fixture_api
+
+
+class FastSerializerTest(unittest.TestCase):
+    '''
+        Fast envelopes have to be byte for byte what zeep renders.
+    '''
+
+    OPERATIONS = ('generatePackagesNumbersV4', 'generateSpedLabelsV4', 'generateProtocolV2', 'findPostalCodeV1')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = fixture_api()
+        cls.serializer = DPDFastSerializer(cls.api, operations=cls.OPERATIONS)
+
+    def assertSameEnvelope(self, operation, *args):
+        fast = self.serializer.render(operation, *args)
+        self.assertEqual(fast, self.serializer.render_zeep(operation, *args))
+        return fast
+
+    def shipment(self, packageData=None, servicesData=None, **kwargs):
+        return self.api.GenerateSingleParcelShipment(
+            packageData=packageData or {'weight': 2.5},
+            recieverData=RECIPIENT_DATA,
+            servicesData=servicesData or {},
+            returnPayload=True,
+            **kwargs
+        )
+
+    def test_single_parcel_shipment(self):
+        self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(
+            packageData={'weight': 2.5, 'sizeX': 10, 'sizeY': 20, 'sizeZ': 30, 'content': 'Books', 'reference': 'REF/1'},
+            ref1='order 1', reference='order-1', thirdPartyFID=42, payerType='THIRD_PARTY'
+        ))
+
+    def test_sender_data(self):
+        self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(senderData=dict(SENDER_DATA, fid='1')))
+
+    def test_cod(self):
+        envelope = self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(
+            servicesData={'cod': 12.99, 'codCurrency': 'EUR'}
+        ))
+
+        self.assertIn(b'<cod><amount>12.99</amount><currency>EUR</currency></cod>', envelope)
+
+    def test_pallet(self):
+        envelope = self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(servicesData={'pallet': True}))
+        self.assertIn(b'<pallet/>', envelope)
+
+    def test_services(self):
+        self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(servicesData={
+            'carryIn': True,
+            'cud': True,
+            'declaredValue': 100,
+            'dedicatedDelivery': True,
+            'documentsInternational': True,
+            'dox': True,
+            'dpdExpress': True,
+            'dpdPickup': 'PL11033',
+            'duty': 50,
+            'dutyCurrency': 'EUR',
+            'inPers': True,
+            'privPers': True,
+            'rod': True,
+            'selfCol': 'PRIV',
+            'tires': True,
+            'tiresExport': True,
+        }))
+
+    def test_duty_and_self_collection(self):
+        envelope = self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(
+            servicesData={'duty': 50, 'selfCol': 'COMP'}
+        ))
+
+        self.assertIn(b'<duty><amount>50</amount><currency>PLN</currency></duty>', envelope)
+        self.assertIn(b'<selfCol><receiver>COMP</receiver></selfCol>', envelope)
+
+    def test_plain_dicts(self):
+        packages = {'packages': [{
+            'parcels': [{'weight': 1}, {'weight': 2.25, 'content': 'second'}],
+            'payerType': 'SENDER',
+            'receiver': {'city': 'Other City', 'postalCode': '11111', 'countryCode': 'PL'},
+            'sender': {'city': 'City Name', 'postalCode': '00999', 'fid': 1495},
+            'services': {'cod': {'amount': '10', 'currency': 'PLN'}, 'pallet': {}},
+        }]}
+
+        self.assertSameEnvelope('generatePackagesNumbersV4', packages, 'IGNORE_ERRORS', 'PL', self.serializer.authData)
+
+    def test_escaping(self):
+        envelope = self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(
+            packageData={'weight': 1, 'content': 'Fish & <Chips> "quoted"'},
+            ref1='a < b & c > d'
+        ))
+
+        self.assertIn(b'Fish &amp; &lt;Chips&gt; "quoted"', envelope)
+
+    def test_unicode(self):
+        self.assertSameEnvelope('generatePackagesNumbersV4', *self.shipment(
+            packageData={'weight': 1, 'content': 'Zażółć gęślą jaźń'}
+        ))
+
+    def test_none_in_repeated_elements(self):
+        packages = {'packages': [
+            None,
+            {'parcels': [None, {'weight': 1}, None], 'ref1': None},
+            None,
+        ]}
+
+        self.assertSameEnvelope('generatePackagesNumbersV4', packages, 'IGNORE_ERRORS', 'PL', self.serializer.authData)
+
+    def test_empty_repeated_elements(self):
+        self.assertSameEnvelope(
+            'generatePackagesNumbersV4', {'packages': []}, 'IGNORE_ERRORS', 'PL', self.serializer.authData
+        )
+
+    def test_label(self):
+        self.assertSameEnvelope('generateSpedLabelsV4', *self.api.GenerateSpedLabel(
+            waybill='0000000000001A', outputDocFormat='ZPL', returnPayload=True
+        ))
+
+        self.assertSameEnvelope('generateSpedLabelsV4', *self.api.GenerateSpedLabel(
+            packageId=123, sessionId=456, sessionType='INTERNATIONAL', returnPayload=True
+        ))
+
+    def test_protocol(self):
+        self.assertSameEnvelope('generateProtocolV2', *self.api.generateProtocol(
+            ['0000000000001A', '0000000000002A', '0000000000003A'], outputDocFormat='PDF', docPageFormat='A4', returnPayload=True
+        ))
+
+    def test_postal_code(self):
+        self.assertSameEnvelope('findPostalCodeV1', {'countryCode': 'PL', 'zipCode': '00999'}, self.api.authPayload)
+
+    def test_too_many_arguments(self):
+        with self.assertRaises(TypeError):
+            self.serializer.render('findPostalCodeV1', {}, self.api.authPayload, 'extra')
+
+    def test_message_falls_back_to_zeep(self):
+        serializer = DPDFastSerializer(self.api, operations=('findPostalCodeV1',))
+        serializer.render = lambda operation, *args: b'broken'
+
+        message = serializer.message('findPostalCodeV1', {'zipCode': '00999'}, self.api.authPayload)
+
+        self.assertEqual(message, serializer.render_zeep('findPostalCodeV1', {'zipCode': '00999'}, self.api.authPayload))
+        self.assertIs(serializer.verified['findPostalCodeV1'], False)
+        self.assertFalse(serializer.is_fast('findPostalCodeV1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+from . import fixture_api
+from .stub import DPDStubServer
+
+
+class ThreadedContextTest(unittest.TestCase):
+    '''
+        Threads sharing one instance keep their own sender and policy - small version of benchmarks/stress_threads.py.
+    '''
+
+    THREADS = 40
+    CALLS = 3
+
+    def test_contexts_do_not_leak(self):
+        with DPDStubServer(delay=0.001) as stub:
+            api = fixture_api(wsdl=stub.wsdl_url)
+            api.setPickupAddress({'city': 'Default'})
+
+            errors = []
+            barrier = threading.Barrier(self.THREADS)
+
+            def worker(n):
+                barrier.wait()
+
+                try:
+                    with api.context(senderData={'city': 'Sender %d' % n}, generationPolicy=1 + n % 3):
+                        for i in range(self.CALLS):
+                            payload = api.GenerateSingleParcelShipment(
+                                {'weight': 1}, {'city': 'Reciever %d' % n}, {}, returnPayload=True
+                            )
+
+                            self.assertEqual(payload[0].packages[0].sender.city, 'Sender %d' % n)
+                            self.assertEqual(payload[1], api.GP_VALUES[1 + n % 3])
+
+                            api.generatePackagesNumbersV4(*payload)
+                except Exception as e:
+                    errors.append((n, repr(e)))
+
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(api.pickup_address.city, 'Default')
+        self.assertEqual(
+            len([op for op, message in stub.requests if op == 'generatePackagesNumbersV4']), self.THREADS * self.CALLS
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from zeep.exceptions import TransportError
+from zeep.helpers import serialize_object
+
+from dpd_info_client_api.transports import (
+    DPDRecordFile, DPDRecordingTransport, DPDReplayTransport, LOAD_OPERATION, operation_name, redact
+)
+
+from . import RECIPIENT_DATA, fixture_api
+from .stub import DPDStubServer
+
+
+def traffic(api):
+    '''
+        Same calls for recording and replay - results as plain dicts.
+    '''
+
+    return [
+        serialize_object(api.GenerateSingleParcelShipment({'weight': 1}, RECIPIENT_DATA, {'cod': 10}), dict),
+        serialize_object(api.GenerateSpedLabel(waybill='0000000000001A', outputDocFormat='ZPL'), dict),
+        serialize_object(api.generateProtocol(['0000000000001A']), dict),
+        serialize_object(api.findPostalCode('00-999'), dict),
+        serialize_object(api.getCourierOrderAvailability('00-999'), dict),
+    ]
+
+
+class RecordReplayTest(unittest.TestCase):
+    '''
+        Traffic recorded against the stub replays without network with the same results.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'dpd.rec')
+
+        with DPDStubServer() as stub:
+            cls.wsdl_url = stub.wsdl_url
+            cls.recorded = traffic(fixture_api(transport=DPDRecordingTransport(cls.path), wsdl=stub.wsdl_url))
+            cls.stub_requests = list(stub.requests)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_recorded_operations(self):
+        self.assertEqual(DPDRecordFile(self.path).operations(), sorted([
+            LOAD_OPERATION,
+            'findPostalCodeV1',
+            'generatePackagesNumbersV4',
+            'generateProtocolV2',
+            'generateSpedLabelsV4',
+            'getCourierOrderAvailabilityV1',
+        ]))
+
+    def test_credentials_are_not_recorded(self):
+        #stub got the real ones
+        self.assertIn(b'<password>secret</password>', self.stub_requests[0][1])
+
+        for record in DPDRecordFile(self.path).read():
+            self.assertNotIn(b'secret', record['request'])
+            self.assertNotIn(b'<login>login</login>', record['request'])
+            self.assertNotIn(b'1495', record['request'])
+
+        record = next(DPDRecordFile(self.path).read('findPostalCodeV1'))
+        self.assertIn(b'<login>REDACTED</login>', record['request'])
+        self.assertIn(b'<password>REDACTED</password>', record['request'])
+        self.assertIn(b'<masterFid>REDACTED</masterFid>', record['request'])
+
+    def test_redact_keeps_other_elements(self):
+        message = b'<ns0:authDataV1><login>a</login><ns1:password x="1">b&amp;c</ns1:password></ns0:authDataV1><passwords>d</passwords>'
+
+        self.assertEqual(
+            redact(message),
+            b'<ns0:authDataV1><login>REDACTED</login><ns1:password x="1">REDACTED</ns1:password></ns0:authDataV1><passwords>d</passwords>'
+        )
+
+    def test_replay(self):
+        #stub is down - everything comes from the record file
+        api = fixture_api(transport=DPDReplayTransport(self.path, latencyScale=0), wsdl=self.wsdl_url)
+
+        self.assertEqual(traffic(api), self.recorded)
+
+    def test_replayed_results(self):
+        shipment, label, protocol, postalCode, availability = self.recorded
+
+        self.assertEqual(shipment['Status'], 'OK')
+        self.assertEqual(shipment['Packages']['Package'][0]['Parcels']['Parcel'][0]['Waybill'], '0000000000001A')
+        self.assertTrue(label['documentData'].startswith(b'^XA'))
+        self.assertTrue(protocol['documentData'].startswith(b'%PDF'))
+        self.assertEqual(postalCode, 'OK')
+        self.assertEqual([r['range'] for r in availability['ranges']], ['09:00-12:00', '12:00-15:00'])
+
+    def test_replay_missing_operation(self):
+        transport = DPDReplayTransport(self.path, latencyScale=0)
+        transport.records.pop('findPostalCodeV1')
+
+        api = fixture_api(transport=transport, wsdl=self.wsdl_url)
+
+        with self.assertRaises(TransportError):
+            api.findPostalCode('00-999')
+
+    def test_operation_name(self):
+        record = next(DPDRecordFile(self.path).read('generateSpedLabelsV4'))
+        self.assertEqual(operation_name(record['request']), 'generateSpedLabelsV4')
+
+
+if __name__ == '__main__':
+    unittest.main()